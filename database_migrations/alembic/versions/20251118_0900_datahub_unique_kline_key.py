@@ -0,0 +1,58 @@
+"""datahub_unique_kline_key
+
+Revision ID: 20251118_0900
+Revises: 20251117_2100
+Create Date: 2025-11-18 09:00:00.000000
+
+DataHub: make (symbol, interval, open_time) unique on klines.
+
+Description:
+    K-line collection upserts with INSERT ... ON CONFLICT (symbol, interval, open_time),
+    which requires a unique index on those columns. The existing non-unique
+    idx_kline_symbol_interval_time index is replaced by a unique one with the
+    same name and columns, so query plans are unaffected.
+
+    Duplicate rows (if any) are removed first, keeping the most recent id.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '20251118_0900'
+down_revision: Union[str, None] = '20251117_2100'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Remove duplicate K-lines (keep the highest id per key)
+    op.execute(
+        """
+        DELETE FROM klines a
+        USING klines b
+        WHERE a.symbol = b.symbol
+          AND a.interval = b.interval
+          AND a.open_time = b.open_time
+          AND a.id < b.id
+        """
+    )
+
+    # Replace the lookup index with a unique one
+    op.drop_index('idx_kline_symbol_interval_time', table_name='klines')
+    op.create_index(
+        'idx_kline_symbol_interval_time',
+        'klines',
+        ['symbol', 'interval', 'open_time'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_kline_symbol_interval_time', table_name='klines')
+    op.create_index(
+        'idx_kline_symbol_interval_time',
+        'klines',
+        ['symbol', 'interval', 'open_time'],
+        unique=False
+    )
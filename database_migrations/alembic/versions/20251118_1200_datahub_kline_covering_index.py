@@ -0,0 +1,54 @@
+"""datahub_kline_covering_index
+
+Revision ID: 20251118_1200
+Revises: 20251118_0900
+Create Date: 2025-11-18 12:00:00.000000
+
+DataHub: covering index for latest-first K-line reads.
+
+Description:
+    get_klines, get_latest_kline and the batch window query all filter on
+    (symbol, interval) and order by open_time DESC. The new index matches that
+    order and carries the OHLCV payload (PostgreSQL INCLUDE), so LIMIT queries
+    reading those columns can be answered with an index-only range scan.
+
+    The unique idx_kline_symbol_interval_time index is kept: ON CONFLICT
+    upserts depend on it.
+
+    Built with CREATE INDEX CONCURRENTLY so the klines table stays writable
+    while the index is created.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '20251118_1200'
+down_revision: Union[str, None] = '20251118_0900'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_kline_sym_int_time',
+            'klines',
+            ['symbol', 'interval', sa.text('open_time DESC')],
+            unique=False,
+            postgresql_include=[
+                'close_time', 'open_price', 'high_price', 'low_price', 'close_price', 'volume'
+            ],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_kline_sym_int_time',
+            table_name='klines',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,126 @@
+"""datahub_partition_klines
+
+Revision ID: 20251118_1500
+Revises: 20251118_1200
+Create Date: 2025-11-18 15:00:00.000000
+
+DataHub: partition klines by interval and open_time.
+
+Description:
+    klines becomes a declaratively partitioned table:
+
+        klines                 PARTITION BY LIST (interval)
+          klines_1m            FOR VALUES IN ('1m') PARTITION BY RANGE (open_time)
+            klines_1m_2017 ... klines_1m_2030   one per calendar year (UTC, ms)
+            klines_1m_default  rows outside the pre-created years
+          ...                  same for 5m, 15m, 1h, 4h, 1d
+          klines_default       any other interval
+
+    K-line queries always filter on symbol, interval and an open_time
+    range/order, so the planner prunes to one interval partition and the
+    year partitions covering the window.
+
+    Year partitions are pre-created through 2030 (pg_partman is not available
+    in the postgres:16-alpine image); rows beyond that land in the per-interval
+    DEFAULT partition until more years are added.
+
+    PostgreSQL requires unique constraints on a partitioned table to include
+    the partition key, so the primary key becomes (id, interval, open_time);
+    id keeps its sequence and stays unique in practice. All existing indexes
+    are recreated on the parent (the covering index without CONCURRENTLY,
+    which partitioned tables don't support).
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '20251118_1500'
+down_revision: Union[str, None] = '20251118_1200'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Intervals collected by the DataHub scheduler
+INTERVALS = ('1m', '5m', '15m', '1h', '4h', '1d')
+
+# Year partitions pre-created per interval (inclusive)
+FIRST_YEAR = 2017
+LAST_YEAR = 2030
+
+
+def _year_start_ms(year: int) -> int:
+    """Unix milliseconds of January 1st of a year (UTC)."""
+    return int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp()) * 1000
+
+
+def _create_indexes() -> None:
+    """Create the klines indexes (names match 30eb898ddf84, 20251118_0900 and 20251118_1200)."""
+    op.execute("CREATE INDEX idx_kline_source_symbol ON klines (source, symbol)")
+    op.execute(
+        "CREATE UNIQUE INDEX idx_kline_symbol_interval_time ON klines (symbol, interval, open_time)"
+    )
+    op.execute("CREATE INDEX ix_klines_id ON klines (id)")
+    op.execute("CREATE INDEX ix_klines_interval ON klines (interval)")
+    op.execute("CREATE INDEX ix_klines_open_time ON klines (open_time)")
+    op.execute("CREATE INDEX ix_klines_symbol ON klines (symbol)")
+    op.execute(
+        """
+        CREATE INDEX ix_kline_sym_int_time ON klines (symbol, interval, open_time DESC)
+        INCLUDE (close_time, open_price, high_price, low_price, close_price, volume)
+        """
+    )
+
+
+def _swap_out_klines() -> None:
+    """Rename klines to klines_old, keeping its id sequence alive for the new table."""
+    op.execute("ALTER SEQUENCE klines_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE klines RENAME TO klines_old")
+    # Free the klines_pkey name for the new table's primary key
+    op.execute("ALTER TABLE klines_old RENAME CONSTRAINT klines_pkey TO klines_old_pkey")
+
+
+def _copy_and_drop_old() -> None:
+    """Move rows from klines_old into the new klines table and drop the old one."""
+    op.execute("INSERT INTO klines SELECT * FROM klines_old")
+    op.execute("DROP TABLE klines_old")
+    op.execute("ALTER SEQUENCE klines_id_seq OWNED BY klines.id")
+
+
+def upgrade() -> None:
+    _swap_out_klines()
+
+    # Same columns, NOT NULLs and defaults (including nextval on id)
+    op.execute(
+        "CREATE TABLE klines (LIKE klines_old INCLUDING DEFAULTS) PARTITION BY LIST (interval)"
+    )
+    op.execute("ALTER TABLE klines ADD PRIMARY KEY (id, interval, open_time)")
+
+    for interval in INTERVALS:
+        parent = f"klines_{interval}"
+        op.execute(
+            f"CREATE TABLE {parent} PARTITION OF klines "
+            f"FOR VALUES IN ('{interval}') PARTITION BY RANGE (open_time)"
+        )
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            op.execute(
+                f"CREATE TABLE {parent}_{year} PARTITION OF {parent} "
+                f"FOR VALUES FROM ({_year_start_ms(year)}) TO ({_year_start_ms(year + 1)})"
+            )
+        op.execute(f"CREATE TABLE {parent}_default PARTITION OF {parent} DEFAULT")
+
+    op.execute("CREATE TABLE klines_default PARTITION OF klines DEFAULT")
+
+    _copy_and_drop_old()
+    _create_indexes()
+
+
+def downgrade() -> None:
+    _swap_out_klines()
+
+    op.execute("CREATE TABLE klines (LIKE klines_old INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE klines ADD PRIMARY KEY (id)")
+
+    # Dropping the partitioned parent drops every partition
+    _copy_and_drop_old()
+    _create_indexes()
@@ -0,0 +1,55 @@
+"""datahub_onchain_tx_hash_unique
+
+Revision ID: 20251118_1800
+Revises: 20251118_1500
+Create Date: 2025-11-18 18:00:00.000000
+
+DataHub: unique per-transaction on-chain events.
+
+Description:
+    Large transfer and smart money rows are deduplicated by
+    (symbol, network, additional_metrics->>'transaction_hash'). A partial
+    unique expression index on that key lets collection insert a whole batch
+    with INSERT ... ON CONFLICT DO NOTHING instead of checking each
+    transaction with its own SELECT. Aggregate rows (no transaction hash)
+    are not covered by the index.
+
+    Duplicate rows (if any) are removed first, keeping the lowest id (the
+    row the old existence check kept).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '20251118_1800'
+down_revision: Union[str, None] = '20251118_1500'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Remove duplicate transactions (keep the lowest id per key)
+    op.execute(
+        """
+        DELETE FROM onchain_metrics a
+        USING onchain_metrics b
+        WHERE a.symbol = b.symbol
+          AND a.network = b.network
+          AND a.additional_metrics->>'transaction_hash' = b.additional_metrics->>'transaction_hash'
+          AND a.id > b.id
+        """
+    )
+
+    op.create_index(
+        'idx_onchain_symbol_network_tx_hash',
+        'onchain_metrics',
+        ['symbol', 'network', sa.text("(additional_metrics->>'transaction_hash')")],
+        unique=True,
+        postgresql_where=sa.text("additional_metrics->>'transaction_hash' IS NOT NULL")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_onchain_symbol_network_tx_hash', table_name='onchain_metrics')
@@ -0,0 +1,49 @@
+"""datahub_onchain_latest_index
+
+Revision ID: 20251119_0900
+Revises: 20251118_1800
+Create Date: 2025-11-19 09:00:00.000000
+
+DataHub: (symbol, network, timestamp DESC) index on onchain_metrics.
+
+Description:
+    get_metrics and get_latest_metrics filter on symbol and network and
+    return the newest rows first (ORDER BY timestamp DESC LIMIT n). The
+    existing indexes cover (symbol, timestamp) and (network, symbol)
+    separately, so Postgres had to filter and sort; with this index the
+    query reads the first n index entries of the (symbol, network) range.
+
+    Built with CREATE INDEX CONCURRENTLY so collection keeps writing while
+    the index is created.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '20251119_0900'
+down_revision: Union[str, None] = '20251118_1800'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_onchain_symbol_network_time',
+            'onchain_metrics',
+            ['symbol', 'network', sa.text('timestamp DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_onchain_symbol_network_time',
+            table_name='onchain_metrics',
+            postgresql_concurrently=True
+        )
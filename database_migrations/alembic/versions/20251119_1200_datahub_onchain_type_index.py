@@ -0,0 +1,57 @@
+"""datahub_onchain_type_index
+
+Revision ID: 20251119_1200
+Revises: 20251119_0900
+Create Date: 2025-11-19 12:00:00.000000
+
+DataHub: index the on-chain metric type for latest-metric lookups.
+
+Description:
+    get_latest_metrics filters on symbol, network and the metric type stored
+    in additional_metrics->>'type', newest first. This expression index puts
+    the type next to the other keys, so each lookup reads a single index
+    entry instead of scanning every row of the (symbol, network) pair.
+
+    additional_metrics is a json (not jsonb) column, so a GIN index with
+    @> containment isn't available; a btree on the extracted key serves the
+    equality filter directly.
+
+    Built with CREATE INDEX CONCURRENTLY so collection keeps writing while
+    the index is created.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '20251119_1200'
+down_revision: Union[str, None] = '20251119_0900'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_onchain_type_latest',
+            'onchain_metrics',
+            [
+                'symbol',
+                'network',
+                sa.text("(additional_metrics->>'type')"),
+                sa.text('timestamp DESC')
+            ],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_onchain_type_latest',
+            table_name='onchain_metrics',
+            postgresql_concurrently=True
+        )
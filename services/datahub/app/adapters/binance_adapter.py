@@ -5,8 +5,9 @@ Provides interface to fetch K-line (candlestick) data from Binance API.
 """
 
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime, timedelta
+import httpx
 from dotenv import load_dotenv
 from binance.client import Client
 from binance.exceptions import BinanceAPIException, BinanceRequestException
@@ -19,6 +20,8 @@ load_dotenv()
 
 logger = setup_logging("binance_adapter")
 
+BINANCE_FUTURES_BASE_URL = "https://fapi.binance.com"
+
 
 class BinanceAdapter:
     """
@@ -65,6 +68,25 @@ class BinanceAdapter:
             except Exception as e:
                 logger.error(f"Failed to initialize Binance client: {e}")
                 self.client = None
+        
+        # Futures REST client, created on first use and reused for keep-alive
+        self._futures_client: Optional[httpx.AsyncClient] = None
+    
+    def _get_futures_client(self) -> httpx.AsyncClient:
+        """Return the shared async HTTP client for the Futures API."""
+        if self._futures_client is None:
+            self._futures_client = httpx.AsyncClient(
+                base_url=BINANCE_FUTURES_BASE_URL,
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=50)
+            )
+        return self._futures_client
+    
+    async def aclose(self):
+        """Close the Futures HTTP client and its connection pool."""
+        if self._futures_client is not None:
+            await self._futures_client.aclose()
+            self._futures_client = None
     
     @retry(
         stop=stop_after_attempt(3),
@@ -76,8 +98,8 @@ class BinanceAdapter:
         self,
         symbol: str,
         interval: str,
-        start_time: Optional[datetime] = None,
-        end_time: Optional[datetime] = None,
+        start_time: Optional[Union[datetime, int]] = None,
+        end_time: Optional[Union[datetime, int]] = None,
         limit: int = 500
     ) -> List[Dict[str, Any]]:
         """
@@ -86,8 +108,8 @@ class BinanceAdapter:
         Args:
             symbol: Trading pair symbol (e.g., "BTCUSDT")
             interval: K-line interval (e.g., "1m", "1h", "1d")
-            start_time: Start time for data fetch
-            end_time: End time for data fetch
+            start_time: Start time for data fetch (datetime or epoch ms)
+            end_time: End time for data fetch (datetime or epoch ms)
             limit: Maximum number of K-lines to fetch (default 500, max 1000)
 
         Returns:
@@ -108,13 +130,13 @@ class BinanceAdapter:
             limit = 1000
         
         try:
-            # Convert datetime to milliseconds timestamp
+            # Convert datetime to milliseconds timestamp (epoch ms passes through)
             start_str = None
             end_str = None
-            if start_time:
-                start_str = str(int(start_time.timestamp() * 1000))
-            if end_time:
-                end_str = str(int(end_time.timestamp() * 1000))
+            if start_time is not None:
+                start_str = str(start_time if isinstance(start_time, int) else int(start_time.timestamp() * 1000))
+            if end_time is not None:
+                end_str = str(end_time if isinstance(end_time, int) else int(end_time.timestamp() * 1000))
             
             logger.info(f"Fetching K-lines for {symbol} with interval {interval}, limit {limit}")
             
@@ -248,7 +270,7 @@ class BinanceAdapter:
         retry=retry_if_exception_type((BinanceAPIException, BinanceRequestException)),
         reraise=True
     )
-    def get_funding_rate(
+    async def get_funding_rate(
         self,
         symbol: str,
         start_time: Optional[datetime] = None,
@@ -298,12 +320,7 @@ class BinanceAdapter:
             logger.info(f"Fetching funding rates for {symbol}, limit {limit}")
 
             # Call Binance Futures API
-            # Note: Using requests directly as python-binance may not have this method
-            import requests
-
-            base_url = "https://fapi.binance.com"
-            endpoint = "/fapi/v1/fundingRate"
-
+            # Note: Using httpx directly as python-binance may not have this method
             params = {
                 "symbol": symbol,
                 "limit": limit
@@ -313,7 +330,7 @@ class BinanceAdapter:
             if end_str:
                 params["endTime"] = end_str
 
-            response = requests.get(f"{base_url}{endpoint}", params=params, timeout=10)
+            response = await self._get_futures_client().get("/fapi/v1/fundingRate", params=params)
             response.raise_for_status()
 
             funding_rates = response.json()
@@ -331,12 +348,13 @@ class BinanceAdapter:
             logger.info(f"Successfully fetched {len(result)} funding rates for {symbol}")
             return result
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Request error fetching funding rates: {e}")
             from services.datahub.app.exceptions import ExternalAPIException
             raise ExternalAPIException(
                 message=f"Binance Futures API request error: {str(e)}",
-                details={"provider": "binance_futures", "symbol": symbol}
+                provider="binance_futures",
+                details={"symbol": symbol}
             )
         except Exception as e:
             logger.error(f"Error fetching funding rates: {e}")
@@ -37,11 +37,18 @@ class BitqueryAdapter(ChainDataInterface):
         self.api_key = api_key or os.getenv("BITQUERY_API_KEY")
         self.api_url = api_url or os.getenv("BITQUERY_API_URL", "https://streaming.bitquery.io/graphql")
         
+        # Reused across queries so keep-alive connections are pooled
+        self._client = httpx.Client(timeout=30.0)
+        
         if not self.api_key:
             logger.warning("Bitquery API key not configured")
         else:
             logger.info("Bitquery adapter initialized successfully")
     
+    def close(self):
+        """Close the underlying HTTP client and its connection pool."""
+        self._client.close()
+    
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=2, min=4, max=30))
     def _execute_query(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -71,17 +78,16 @@ class BitqueryAdapter(ChainDataInterface):
             payload["variables"] = variables
         
         try:
-            with httpx.Client(timeout=30.0) as client:
-                response = client.post(self.api_url, json=payload, headers=headers)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                if "errors" in data:
-                    logger.error(f"Bitquery API errors: {data['errors']}")
-                    raise ValueError(f"Bitquery API errors: {data['errors']}")
-                
-                return data.get("data", {})
+            response = self._client.post(self.api_url, json=payload, headers=headers)
+            response.raise_for_status()
+            
+            data = response.json()
+            
+            if "errors" in data:
+                logger.error(f"Bitquery API errors: {data['errors']}")
+                raise ValueError(f"Bitquery API errors: {data['errors']}")
+            
+            return data.get("data", {})
                 
         except httpx.HTTPError as e:
             logger.error(f"Bitquery API request failed: {e}")
@@ -607,11 +613,13 @@ class BitqueryAdapter(ChainDataInterface):
                 "0x3f5ce5fbfe3e9af3971dd833d26ba9b5c936f0be",  # Binance 16
             ]
 
-        # Query for inflows (transfers TO exchange addresses)
+        # Query for inflows (transfers TO exchange addresses), aggregated by
+        # Bitquery: only the count and total amount are returned, not every transfer
         inflow_query = """
         query GetExchangeInflow(
             $network: evm_network,
             $addresses: [String!],
+            $symbol: String,
             $startTime: DateTime,
             $endTime: DateTime
         ) {
@@ -620,28 +628,29 @@ class BitqueryAdapter(ChainDataInterface):
               where: {
                 Transfer: {
                   Receiver: {in: $addresses}
+                  Currency: {
+                    Symbol: {is: $symbol}
+                  }
                 }
                 Block: {
                   Time: {since: $startTime, till: $endTime}
                 }
               }
             ) {
-              Transfer {
-                Amount
-                Currency {
-                  Symbol
-                }
-              }
+              count
+              sum(of: Transfer_Amount)
             }
           }
         }
         """
 
-        # Query for outflows (transfers FROM exchange addresses)
+        # Query for outflows (transfers FROM exchange addresses); rows are kept
+        # for the unique address count
         outflow_query = """
         query GetExchangeOutflow(
             $network: evm_network,
             $addresses: [String!],
+            $symbol: String,
             $startTime: DateTime,
             $endTime: DateTime
         ) {
@@ -650,6 +659,9 @@ class BitqueryAdapter(ChainDataInterface):
               where: {
                 Transfer: {
                   Sender: {in: $addresses}
+                  Currency: {
+                    Symbol: {is: $symbol}
+                  }
                 }
                 Block: {
                   Time: {since: $startTime, till: $endTime}
@@ -660,9 +672,6 @@ class BitqueryAdapter(ChainDataInterface):
                 Amount
                 Sender
                 Receiver
-                Currency {
-                  Symbol
-                }
               }
             }
           }
@@ -671,6 +680,7 @@ class BitqueryAdapter(ChainDataInterface):
 
         variables = {
             "network": network,
+            "symbol": symbol,
             "addresses": exchange_addresses,
             "startTime": start_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
             "endTime": end_time.strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -679,26 +689,27 @@ class BitqueryAdapter(ChainDataInterface):
         try:
             logger.info(f"Fetching exchange netflow for {symbol} on {network}")
 
-            # Fetch inflows
+            # Fetch inflow aggregate (a single row)
             inflow_data = self._execute_query(inflow_query, variables)
-            inflows = inflow_data.get("EVM", {}).get("Transfers", [])
+            inflow_rows = inflow_data.get("EVM", {}).get("Transfers", [])
+            inflow_totals = inflow_rows[0] if inflow_rows else {}
+            inflow_count = int(inflow_totals.get("count") or 0)
 
-            # Fetch outflows
+            # Fetch outflows (already filtered to the symbol)
             outflow_data = self._execute_query(outflow_query, variables)
             outflows = outflow_data.get("EVM", {}).get("Transfers", [])
 
             # Calculate totals
-            total_inflow = sum(float(t["Transfer"]["Amount"]) for t in inflows if t["Transfer"]["Currency"]["Symbol"] == symbol)
-            total_outflow = sum(float(t["Transfer"]["Amount"]) for t in outflows if t["Transfer"]["Currency"]["Symbol"] == symbol)
+            total_inflow = float(inflow_totals.get("sum") or 0)
+            total_outflow = sum(float(t["Transfer"]["Amount"]) for t in outflows)
             netflow = total_inflow - total_outflow
 
             # Count unique addresses
             unique_senders = set()
             unique_receivers = set()
             for t in outflows:
-                if t["Transfer"]["Currency"]["Symbol"] == symbol:
-                    unique_senders.add(t["Transfer"]["Sender"])
-                    unique_receivers.add(t["Transfer"]["Receiver"])
+                unique_senders.add(t["Transfer"]["Sender"])
+                unique_receivers.add(t["Transfer"]["Receiver"])
 
             result = {
                 "symbol": symbol,
@@ -713,7 +724,7 @@ class BitqueryAdapter(ChainDataInterface):
                 "inflow_usd": None,  # Would need price data
                 "outflow_usd": None,
                 "netflow_usd": None,
-                "transaction_count": len(inflows) + len(outflows),
+                "transaction_count": inflow_count + len(outflows),
                 "unique_addresses": len(unique_senders | unique_receivers)
             }
 
@@ -3,14 +3,15 @@ Health Check API Endpoints
 """
 
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any
 from dotenv import load_dotenv
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from shared.utils.database import get_db
+from shared.utils.database import get_async_db
 from shared.utils.redis_client import get_redis_client
 from shared.models.schemas import HealthCheckResponse
 
@@ -19,9 +20,15 @@ load_dotenv()
 
 router = APIRouter()
 
+SERVICE_NAME = "DataHub"
+SERVICE_VERSION = "0.1.0"
+
+# Probe statement shared by the health and readiness checks
+_PING_SQL = text("SELECT 1")
+
 
 @router.get("/", response_model=HealthCheckResponse)
-async def health_check(db: Session = Depends(get_db)) -> HealthCheckResponse:
+async def health_check(db: AsyncSession = Depends(get_async_db)) -> HealthCheckResponse:
     """
     Health check endpoint.
     
@@ -34,8 +41,7 @@ async def health_check(db: Session = Depends(get_db)) -> HealthCheckResponse:
     
     # Check database
     try:
-        from sqlalchemy import text
-        db.execute(text("SELECT 1"))
+        await db.execute(_PING_SQL)
         dependencies["database"] = "healthy"
     except Exception as e:
         dependencies["database"] = f"unhealthy: {str(e)}"
@@ -62,21 +68,20 @@ async def health_check(db: Session = Depends(get_db)) -> HealthCheckResponse:
     
     return HealthCheckResponse(
         status=status,
-        service="DataHub",
-        version="0.1.0",
-        timestamp=datetime.utcnow(),
+        service=SERVICE_NAME,
+        version=SERVICE_VERSION,
+        timestamp=datetime.now(timezone.utc),
         dependencies=dependencies,
     )
 
 
 @router.get("/ready")
-async def readiness_check(db: Session = Depends(get_db)) -> Dict[str, str]:
+async def readiness_check(db: AsyncSession = Depends(get_async_db)) -> Dict[str, str]:
     """
     Readiness check endpoint for Kubernetes.
     """
     try:
-        from sqlalchemy import text
-        db.execute(text("SELECT 1"))
+        await db.execute(_PING_SQL)
         return {"status": "ready"}
     except Exception as e:
         return {"status": "not ready", "error": str(e)}
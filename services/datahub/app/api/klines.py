@@ -2,20 +2,41 @@
 K-Line Data API Endpoints
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal, Union
 from datetime import datetime
+from functools import lru_cache
 from decimal import Decimal
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 
-from shared.utils.database import get_db
+from shared.utils.database import get_db, get_async_db
 from shared.models.schemas import BaseResponse
+from services.datahub.app.adapters.binance_adapter import BinanceAdapter
 from services.datahub.app.services.kline_service import KLineService
+from services.datahub.app.scheduler import DataCollectorScheduler
+from services.datahub.app.api.onchain import get_bitquery_adapter
 
 router = APIRouter()
 
 
+@lru_cache(maxsize=1)
+def get_binance_adapter() -> BinanceAdapter:
+    """Shared BinanceAdapter instance (reuses its Futures HTTP connection pool across requests)."""
+    return BinanceAdapter()
+
+
+@lru_cache(maxsize=1)
+def get_data_collector() -> DataCollectorScheduler:
+    """Shared (not started) DataCollectorScheduler running on-demand backfills."""
+    # Reuses the shared adapters, which the app lifespan closes on shutdown
+    return DataCollectorScheduler(
+        binance_adapter=get_binance_adapter(),
+        bitquery_adapter=get_bitquery_adapter()
+    )
+
+
 # Request/Response Models
 class KLineData(BaseModel):
     """K-line data response model"""
@@ -72,23 +93,64 @@ async def collect_klines(
 
     This endpoint fetches K-line data from Binance API and stores it in the database.
     """
-    try:
-        service = KLineService(db)
-        count = service.collect_klines(
-            symbol=request.symbol,
-            interval=request.interval,
-            start_time=request.start_time,
-            end_time=request.end_time,
-            limit=request.limit
-        )
+    service = KLineService(db)
+    count = service.collect_klines(
+        symbol=request.symbol,
+        interval=request.interval,
+        start_time=request.start_time,
+        end_time=request.end_time,
+        limit=request.limit
+    )
+
+    return CollectKLinesResponse(
+        success=True,
+        message=f"Successfully collected {count} K-lines",
+        count=count
+    )
+
+
+class KLinePair(BaseModel):
+    """A (symbol, interval) pair for multi-pair endpoints"""
+    symbol: str = Field(..., description="Trading pair symbol (e.g., BTCUSDT)")
+    interval: str = Field(..., description="K-line interval (e.g., 1h)")
 
-        return CollectKLinesResponse(
-            success=True,
-            message=f"Successfully collected {count} K-lines",
-            count=count
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+class BackfillKLinesRequest(BaseModel):
+    """Request model for backfilling historical K-lines"""
+    pairs: List[KLinePair] = Field(..., min_length=1, description="(symbol, interval) pairs to backfill")
+    start_time: datetime = Field(..., description="Start time of the backfill")
+    end_time: Optional[datetime] = Field(None, description="End time of the backfill (default: now)")
+
+
+class BackfillKLinesResponse(BaseModel):
+    """Response model for a historical K-line backfill"""
+    success: bool
+    success_count: int
+    error_count: int
+
+
+@router.post("/collect/historical", response_model=BackfillKLinesResponse)
+async def backfill_historical_klines(
+    request: BackfillKLinesRequest
+) -> BackfillKLinesResponse:
+    """
+    Backfill historical K-lines for many (symbol, interval) pairs.
+
+    Pairs are backfilled concurrently (at most
+    DataCollectorScheduler.HISTORICAL_BACKFILL_CONCURRENCY at once), each on
+    its own database session. Failed pairs are logged and counted.
+    """
+    success_count, error_count = await get_data_collector().backfill_historical_klines(
+        [(pair.symbol, pair.interval) for pair in request.pairs],
+        start_time=request.start_time,
+        end_time=request.end_time
+    )
+
+    return BackfillKLinesResponse(
+        success=error_count == 0,
+        success_count=success_count,
+        error_count=error_count
+    )
 
 
 @router.get("/{symbol}/{interval}", response_model=List[KLineData])
@@ -98,49 +160,70 @@ async def get_klines(
     start_time: Optional[datetime] = Query(None, description="Start time filter"),
     end_time: Optional[datetime] = Query(None, description="End time filter"),
     limit: int = Query(500, ge=1, le=1000, description="Maximum number of K-lines"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> List[KLineData]:
     """
     Get K-line data from database.
 
     Returns K-line data for the specified symbol and interval.
     """
-    try:
-        service = KLineService(db)
-        klines = service.get_klines(
-            symbol=symbol,
-            interval=interval,
-            start_time=start_time,
-            end_time=end_time,
-            limit=limit
-        )
+    service = KLineService(db)
+    klines = await service.get_klines(
+        symbol=symbol,
+        interval=interval,
+        start_time=start_time,
+        end_time=end_time,
+        limit=limit
+    )
 
-        return [KLineData.from_orm(kline) for kline in klines]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return [KLineData.from_orm(kline) for kline in klines]
 
 
 @router.get("/{symbol}/{interval}/latest", response_model=KLineData)
 async def get_latest_kline(
     symbol: str,
     interval: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> KLineData:
     """
     Get the latest K-line for a symbol and interval.
+
+    Served from Redis when cached; entries expire after roughly a quarter of
+    the candle period and are dropped whenever new K-lines are collected.
     """
-    try:
-        service = KLineService(db)
-        kline = service.get_latest_kline(symbol=symbol, interval=interval)
+    service = KLineService(db)
+    kline = await service.get_latest_kline(symbol=symbol, interval=interval)
+
+    if not kline:
+        raise HTTPException(status_code=404, detail="No K-line data found")
+
+    return KLineData.from_orm(kline)
 
-        if not kline:
-            raise HTTPException(status_code=404, detail="No K-line data found")
 
-        return KLineData.from_orm(kline)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+class LatestKLinesRequest(BaseModel):
+    """Request model for the latest K-lines of many pairs"""
+    pairs: List[KLinePair] = Field(..., description="(symbol, interval) pairs")
+
+
+@router.post("/latest", response_model=Dict[str, KLineData])
+async def get_latest_klines(
+    request: LatestKLinesRequest,
+    db: AsyncSession = Depends(get_async_db)
+) -> Dict[str, KLineData]:
+    """
+    Get the latest K-line of many (symbol, interval) pairs in one query.
+
+    Results are keyed by "{symbol}:{interval}"; pairs without data are omitted.
+    """
+    service = KLineService(db)
+    latest = await service.get_latest_klines(
+        [(pair.symbol, pair.interval) for pair in request.pairs]
+    )
+
+    return {
+        f"{symbol}:{interval}": KLineData.from_orm(kline)
+        for (symbol, interval), kline in latest.items()
+    }
 
 
 # ============================================================================
@@ -160,9 +243,30 @@ class BatchKLinesRequest(BaseModel):
     queries: List[KLineQuery] = Field(..., description="K线查询列表")
 
 
+class ColumnarKLines(BaseModel):
+    """按列排列的K线数据（每个字段一个数组，下标对齐，按open_time降序）"""
+    open_time: List[int] = Field(default_factory=list)
+    close_time: List[int] = Field(default_factory=list)
+    open_price: List[float] = Field(default_factory=list)
+    high_price: List[float] = Field(default_factory=list)
+    low_price: List[float] = Field(default_factory=list)
+    close_price: List[float] = Field(default_factory=list)
+    volume: List[float] = Field(default_factory=list)
+    quote_volume: List[Optional[float]] = Field(default_factory=list)
+    trade_count: List[Optional[int]] = Field(default_factory=list)
+    taker_buy_base_volume: List[Optional[float]] = Field(default_factory=list)
+    taker_buy_quote_volume: List[Optional[float]] = Field(default_factory=list)
+
+    @classmethod
+    def from_rows(cls, rows: List[Any]) -> "ColumnarKLines":
+        """将K线ORM对象列表转置为按列数组"""
+        return cls(**{name: [getattr(row, name) for row in rows] for name in cls.model_fields})
+
+
 class BatchKLinesMetadata(BaseModel):
     """批量查询元数据"""
     total_queries: int = Field(..., description="总查询数")
+    executed_queries: int = Field(..., description="实际执行的数据库查询数（重复查询去重后）")
     successful_queries: int = Field(..., description="成功查询数")
     failed_queries: int = Field(..., description="失败查询数")
     total_klines: int = Field(..., description="返回的K线总数")
@@ -171,9 +275,9 @@ class BatchKLinesMetadata(BaseModel):
 class BatchKLinesResponse(BaseModel):
     """批量K线查询响应"""
     success: bool = Field(..., description="整体是否成功（所有查询都成功才为True）")
-    results: Dict[str, List[KLineData]] = Field(
+    results: Dict[str, Union[List[KLineData], ColumnarKLines]] = Field(
         ...,
-        description="成功的查询结果，key格式为 '{symbol}:{interval}'"
+        description="成功的查询结果，key格式为 '{symbol}:{interval}'（format=columnar 时每个value为按列数组）"
     )
     errors: Dict[str, str] = Field(
         ...,
@@ -185,7 +289,8 @@ class BatchKLinesResponse(BaseModel):
 @router.post("/batch", response_model=BatchKLinesResponse)
 async def get_klines_batch(
     request: BatchKLinesRequest,
-    db: Session = Depends(get_db)
+    format: Literal["rows", "columnar"] = Query("rows", description="返回格式：rows（逐行对象）或 columnar（按列数组）"),
+    db: AsyncSession = Depends(get_async_db)
 ) -> BatchKLinesResponse:
     """
     批量获取K线数据（支持多币种+多时间周期）
@@ -193,13 +298,17 @@ async def get_klines_batch(
     设计目的：
     - 为v2.7模型提供高效的数据获取接口
     - 减少网络往返次数（从7次单点调用降低到1次批量调用）
-    - 使用asyncio并发查询数据库，提升性能
+    - 所有查询合并为一条SQL，只占用一个数据库连接
 
     降级策略：
     - 如果某个查询失败，不影响其他查询
     - 失败的查询会记录在errors字段中
     - 调用方可以根据errors字段决定是否降级处理
 
+    返回格式：
+    - 默认 format=rows，每个组合返回 KLineData 对象列表
+    - format=columnar 时每个组合返回按列数组（字段名不重复，客户端可直接 np.asarray）
+
     示例请求：
     {
         "queries": [
@@ -220,22 +329,19 @@ async def get_klines_batch(
         "errors": {},
         "metadata": {
             "total_queries": 3,
+            "executed_queries": 1,
             "successful_queries": 3,
             "failed_queries": 0,
             "total_klines": 225
         }
     }
     """
-    try:
-        service = KLineService(db)
-
-        # 调用批量查询服务
-        batch_result = await service.get_klines_batch(request.queries)
+    service = KLineService(db)
 
-        return batch_result
+    # 调用批量查询服务
+    batch_result = await service.get_klines_batch(request.queries, columnar=(format == "columnar"))
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return batch_result
 
 
 @router.get("/funding-rates")
@@ -258,10 +364,8 @@ async def get_funding_rates(
         List of funding rate data
     """
     try:
-        from services.datahub.app.adapters.binance_adapter import BinanceAdapter
-
-        adapter = BinanceAdapter()
-        funding_rates = adapter.get_funding_rate(
+        adapter = get_binance_adapter()
+        funding_rates = await adapter.get_funding_rate(
             symbol=symbol,
             start_time=start_time,
             end_time=end_time,
@@ -276,6 +380,4 @@ async def get_funding_rates(
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
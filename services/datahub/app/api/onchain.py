@@ -4,20 +4,37 @@ On-Chain Data API Endpoints
 Provides REST API for collecting and querying on-chain metrics.
 """
 
-from typing import List, Optional
+import asyncio
+from typing import List, Optional, Tuple
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from functools import lru_cache
+import orjson
+from cachetools import LRUCache, TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from shared.utils.database import get_db
+from shared.utils.database import get_db, get_async_db
 from shared.utils.logger import setup_logging
-from services.datahub.app.services.onchain_service import OnChainService
+from shared.utils.redis_client import get_redis_client
+from services.datahub.app.services.onchain_service import OnChainService, LATEST_METRICS_CACHE_TTL
 from services.datahub.app.adapters.bitquery_adapter import BitqueryAdapter
 
 logger = setup_logging("onchain_api")
 router = APIRouter()
 
+# Built OnChainMetricsData keyed by (id, timestamp); metric rows are immutable after insert
+_MODEL_CACHE: LRUCache = LRUCache(maxsize=2048)
+
+# In-process copy of the latest-metrics responses, keyed like the Redis cache.
+# Entries are evicted by latest_invalidation_loop() when a collector publishes
+# an "onchain.*.collected" event, so reads skip the Redis round-trip.
+_LATEST_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=LATEST_METRICS_CACHE_TTL)
+
+# Collector events that make cached latest metrics stale
+COLLECTED_EVENT_PATTERN = "onchain.*.collected"
+
 
 # Request/Response Models
 class CollectLargeTransfersRequest(BaseModel):
@@ -89,7 +106,14 @@ class OnChainMetricsData(BaseModel):
         exchange_inflow, exchange_outflow, exchange_netflow, smart_money_inflow,
         smart_money_outflow, and dex_volume from the additional_metrics JSON field
         if they are not present as direct attributes.
+
+        Results are memoized per (id, timestamp) in a bounded LRU cache.
         """
+        key = (obj.id, obj.timestamp)
+        cached = _MODEL_CACHE.get(key)
+        if cached is not None:
+            return cached
+
         # Get base data from ORM object
         data = {
             'id': obj.id,
@@ -139,14 +163,26 @@ class OnChainMetricsData(BaseModel):
             if hasattr(obj, 'dex_volume_usd') and obj.dex_volume_usd is not None:
                 data['dex_volume'] = obj.dex_volume_usd
 
-        return cls(**data)
+        model = cls(**data)
+        _MODEL_CACHE[key] = model
+        return model
+
+
+@lru_cache(maxsize=1)
+def get_bitquery_adapter() -> BitqueryAdapter:
+    """Shared BitqueryAdapter instance (reuses its HTTP connection pool across requests)."""
+    return BitqueryAdapter()
 
 
 # Dependency: Get OnChainService
 def get_onchain_service(db: Session = Depends(get_db)) -> OnChainService:
     """Dependency to get OnChainService instance."""
-    chain_adapter = BitqueryAdapter()
-    return OnChainService(db, chain_adapter)
+    return OnChainService(db, get_bitquery_adapter())
+
+
+def get_onchain_query_service(db: AsyncSession = Depends(get_async_db)) -> OnChainService:
+    """Dependency to get OnChainService instance bound to an async session (query endpoints)."""
+    return OnChainService(db, get_bitquery_adapter())
 
 
 # API Endpoints
@@ -231,29 +267,59 @@ async def collect_active_addresses(
 @router.get("/{symbol}/{network}", response_model=List[OnChainMetricsData])
 async def get_onchain_metrics(
     symbol: str,
+    response: Response,
     network: str = "eth",
     start_time: Optional[datetime] = Query(None, description="Start time filter"),
     end_time: Optional[datetime] = Query(None, description="End time filter"),
-    limit: int = Query(100, description="Maximum records to return"),
-    service: OnChainService = Depends(get_onchain_service)
+    limit: int = Query(100, ge=1, le=1000, description="Maximum records to return"),
+    cursor: Optional[str] = Query(None, description="Pagination cursor from the X-Next-Cursor header"),
+    before_ts: Optional[datetime] = Query(None, description="Deprecated timestamp-only cursor: return records older than this"),
+    include_raw: bool = Query(False, description="Include the raw additional_metrics JSON"),
+    service: OnChainService = Depends(get_onchain_query_service)
 ):
     """
     Get on-chain metrics from database.
 
-    Query historical on-chain metrics with optional time filters.
+    Query historical on-chain metrics with optional time filters, newest first.
+
+    Pagination: results are ordered by (timestamp, id) descending. When a full
+    page is returned, the ``X-Next-Cursor`` response header carries
+    ``<unix timestamp>:<id>`` of the last record. Pass it back as ``cursor``
+    to fetch the next (older) page; the header is absent on the last page.
+    """
+    metrics = await service.get_metrics(
+        symbol=symbol,
+        network=network,
+        start_time=start_time,
+        end_time=end_time,
+        limit=limit,
+        before_ts=before_ts,
+        include_raw=include_raw,
+        before=_parse_cursor(cursor) if cursor else None
+    )
+
+    if metrics and len(metrics) == limit:
+        last = metrics[-1]
+        last_ts = last["timestamp"]
+        if isinstance(last_ts, datetime):
+            last_ts = int(last_ts.timestamp())
+        response.headers["X-Next-Cursor"] = f"{last_ts}:{last['id']}"
+
+    return metrics
+
+
+def _parse_cursor(cursor: str) -> Tuple[int, int]:
+    """
+    Parse an X-Next-Cursor value ("<unix timestamp>:<id>").
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
     """
     try:
-        metrics = service.get_metrics(
-            symbol=symbol,
-            network=network,
-            start_time=start_time,
-            end_time=end_time,
-            limit=limit
-        )
-        return metrics
-    except Exception as e:
-        logger.error(f"Error querying on-chain metrics: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        timestamp, row_id = cursor.split(":")
+        return int(timestamp), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
 
 
 @router.get("/{symbol}/{network}/latest", response_model=Optional[OnChainMetricsData])
@@ -261,25 +327,87 @@ async def get_latest_metrics(
     symbol: str,
     network: str = "eth",
     metric_type: Optional[str] = Query(None, description="Filter by metric type"),
-    service: OnChainService = Depends(get_onchain_service)
+    service: OnChainService = Depends(get_onchain_query_service)
 ):
     """
     Get the latest on-chain metrics for a symbol.
 
-    Returns the most recent metrics record.
+    Returns the most recent metrics record. Responses are cached in Redis for
+    a short TTL and invalidated by the collectors.
+    """
+    # Try cache first (in-process, then Redis)
+    cache_key = f"onchain:latest:{symbol}:{network}:{metric_type or 'all'}"
+    metrics_data = _LATEST_CACHE.get(cache_key)
+    if metrics_data is not None:
+        return metrics_data
+
+    cached = await asyncio.to_thread(service.redis_client.get, cache_key)
+    if cached:
+        metrics_data = _LATEST_CACHE[cache_key] = OnChainMetricsData.model_validate_json(cached)
+        return metrics_data
+
+    metrics = await service.get_latest_metrics(
+        symbol=symbol,
+        network=network,
+        metric_type=metric_type
+    )
+    if not metrics:
+        raise HTTPException(status_code=404, detail="No metrics found")
+
+    metrics_data = _LATEST_CACHE[cache_key] = OnChainMetricsData.from_orm(metrics)
+    await asyncio.to_thread(
+        service.redis_client.setex,
+        cache_key,
+        LATEST_METRICS_CACHE_TTL,
+        metrics_data.model_dump_json()
+    )
+    return metrics_data
+
+
+def _evict_latest(symbol: str, network: str):
+    """Drop in-process latest-metrics entries of a (symbol, network) pair."""
+    prefix = f"onchain:latest:{symbol}:{network}:"
+    for key in [key for key in _LATEST_CACHE if key.startswith(prefix)]:
+        _LATEST_CACHE.pop(key, None)
+
+
+async def latest_invalidation_loop(poll_timeout: float = 1.0):
+    """
+    Evict in-process latest-metrics entries as collectors publish new data.
+
+    Listens for COLLECTED_EVENT_PATTERN events (published by OnChainService
+    together with its Redis cache delete) and runs until cancelled. The
+    blocking pubsub read runs in a worker thread; eviction happens on the
+    event loop, the only thread that touches _LATEST_CACHE.
+
+    Args:
+        poll_timeout: Seconds each pubsub read waits for a message
     """
+    pubsub = None
     try:
-        metrics = service.get_latest_metrics(
-            symbol=symbol,
-            network=network,
-            metric_type=metric_type
-        )
-        if not metrics:
-            raise HTTPException(status_code=404, detail="No metrics found")
-        return metrics
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error querying latest metrics: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+                    pubsub.psubscribe(COLLECTED_EVENT_PATTERN)
+                message = await asyncio.to_thread(pubsub.get_message, timeout=poll_timeout)
+            except Exception as e:
+                # Redis unavailable: fall back to TTL expiry and retry
+                logger.warning(f"On-chain invalidation listener error: {e}")
+                _LATEST_CACHE.clear()
+                if pubsub is not None:
+                    pubsub.close()
+                    pubsub = None
+                await asyncio.sleep(poll_timeout)
+                continue
+
+            if message and message["type"] == "pmessage":
+                try:
+                    event = orjson.loads(message["data"])
+                    _evict_latest(event["symbol"], event["network"])
+                except (orjson.JSONDecodeError, KeyError, TypeError):
+                    _LATEST_CACHE.clear()
+    finally:
+        if pubsub is not None:
+            pubsub.close()
 
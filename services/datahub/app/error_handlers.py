@@ -2,12 +2,22 @@
 Global Error Handlers
 
 Implements FastAPI exception handlers for standardized error responses.
+
+DataHubException and its subclasses are served by a single table-driven
+handler (HANDLER_TABLE); request validation, HTTP and unhandled exceptions
+keep dedicated handlers.
+
+Pydantic response models are imported from models.error_response on first
+use (see _lazy()), so a service that never errors doesn't build them at
+startup.
 """
 
-import uuid
-from typing import Union
-from fastapi import Request, status
-from fastapi.responses import JSONResponse
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, NamedTuple, Optional, Type
+import orjson
+from fastapi import Request, Response, status
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
@@ -17,294 +27,272 @@ from services.datahub.app.exceptions import (
     ExternalAPIException,
     ValidationException,
     RateLimitException,
-    CircuitBreakerOpenException,
-    ResourceNotFoundException
-)
-from services.datahub.app.models.error_response import (
-    ErrorResponse,
-    ValidationErrorResponse,
-    ExternalAPIErrorResponse,
-    RateLimitErrorResponse,
-    CircuitBreakerErrorResponse,
-    ErrorDetail
+    CircuitBreakerOpenException
 )
-from services.datahub.app.middleware import record_error
+from services.datahub.app.middleware import record_error, get_request_id, route_label, REQUEST_ID_HEADER
 
 logger = setup_logging("error_handlers")
 
+# Level checks let filtered levels skip building log kwargs
+_stdlib_logger = logging.getLogger("error_handlers")
 
-async def datahub_exception_handler(
-    request: Request,
-    exc: DataHubException
-) -> JSONResponse:
+
+def _log_enabled(level_name: str) -> bool:
     """
-    Handle DataHub custom exceptions.
-    
-    Args:
-        request: FastAPI request
-        exc: DataHub exception
-    
-    Returns:
-        JSON response with error details
+    Whether records at level_name ("error", "warning", ...) would be logged.
+
+    Checked per call (isEnabledFor is cached by logging), so level changes
+    made after import apply.
     """
-    request_id = str(uuid.uuid4())
-    
-    # Log the error
-    logger.error(
-        "DataHub exception occurred",
-        error_code=exc.error_code,
-        message=exc.message,
-        details=exc.details,
-        path=request.url.path,
-        request_id=request_id
-    )
-    
-    # Record error metric
-    record_error(
-        error_type=exc.error_code,
-        endpoint=request.url.path,
-        status_code=exc.status_code
-    )
-    
-    # Create error response
-    error_response = ErrorResponse(
-        error_code=exc.error_code,
-        message=exc.message,
-        details=exc.details,
-        path=request.url.path,
-        request_id=request_id
-    )
-    
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=error_response.model_dump()
-    )
+    return _stdlib_logger.isEnabledFor(getattr(logging, level_name.upper()))
 
 
-async def external_api_exception_handler(
-    request: Request,
-    exc: ExternalAPIException
-) -> JSONResponse:
+def _error_body(
+    error_code: str,
+    message: str,
+    path: str,
+    request_id: str,
+    timestamp: datetime,
+    details: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """
-    Handle external API exceptions.
-    
+    Build a plain ErrorResponse-shaped body for fixed-shape error responses.
+
+    Skips Pydantic model construction and model_dump() on the error path.
+    """
+    return {
+        "error_code": error_code,
+        "message": message,
+        "details": details,
+        "path": path,
+        "request_id": request_id,
+        "timestamp": timestamp.isoformat()
+    }
+
+
+def _request_now(request: Request) -> datetime:
+    """
+    Return the request's shared timestamp (set by RequestLoggingMiddleware).
+
+    Falls back to the current time for requests that bypassed the middleware.
+    """
+    return getattr(request.state, "now", None) or datetime.now(timezone.utc)
+
+
+# Response model classes already imported by _lazy(), by name
+_response_models: Dict[str, type] = {}
+
+
+def _lazy(name: str) -> type:
+    """
+    Return a response model from models.error_response, importing it on first use.
+
     Args:
-        request: FastAPI request
-        exc: External API exception
-    
+        name: Class name in services.datahub.app.models.error_response
+
     Returns:
-        JSON response with error details
+        Response model class
     """
-    request_id = str(uuid.uuid4())
-    
-    # Log the error
-    logger.error(
-        "External API exception occurred",
-        error_code=exc.error_code,
-        message=exc.message,
-        provider=exc.details.get("provider"),
-        path=request.url.path,
-        request_id=request_id
-    )
-    
-    # Record error metric
-    record_error(
-        error_type=exc.error_code,
-        endpoint=request.url.path,
-        status_code=exc.status_code
-    )
-    
-    # Create error response
-    error_response = ExternalAPIErrorResponse(
-        error_code=exc.error_code,
-        message=exc.message,
-        provider=exc.details.get("provider"),
-        details=exc.details,
-        path=request.url.path,
-        request_id=request_id
-    )
-    
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=error_response.model_dump()
-    )
+    model = _response_models.get(name)
+    if model is None:
+        from services.datahub.app.models import error_response
+        model = _response_models[name] = getattr(error_response, name)
+    return model
 
 
-async def validation_exception_handler(
-    request: Request,
-    exc: Union[ValidationException, RequestValidationError]
-) -> JSONResponse:
+# Pre-rendered body for HTTP errors; same shape as _error_body(). Dynamic string
+# values are substituted as orjson-encoded (quoted, escaped) JSON fragments.
+_HTTP_ERROR_TEMPLATE = (
+    b'{"error_code":"HTTP_%d","message":%s,"details":null,'
+    b'"path":%s,"request_id":%s,"timestamp":"%s"}'
+)
+
+
+class HandlerSpec(NamedTuple):
     """
-    Handle validation exceptions.
-    
+    How to log and render one DataHubException type.
+
+    Attributes:
+        response_model: Name of the Pydantic response model (resolved by _lazy()),
+            or None for the plain error body
+        log_level: Logger method name ("error", "warning", ...)
+        log_event: Log message
+        fields: Extracts type-specific response fields from the exception
+        headers: Optional extra response headers for the exception
+    """
+    response_model: Optional[str]
+    log_level: str
+    log_event: str
+    fields: Callable[[DataHubException], Dict[str, Any]]
+    headers: Optional[Callable[[DataHubException], Dict[str, str]]] = None
+
+
+HANDLER_TABLE: Dict[Type[DataHubException], HandlerSpec] = {
+    DataHubException: HandlerSpec(
+        None, "error", "DataHub exception occurred",
+        lambda e: {}
+    ),
+    ExternalAPIException: HandlerSpec(
+        "ExternalAPIErrorResponse", "error", "External API exception occurred",
+        lambda e: {"error_code": e.error_code, "provider": e.provider, "details": e.details}
+    ),
+    ValidationException: HandlerSpec(
+        "ValidationErrorResponse", "warning", "Validation exception occurred",
+        lambda e: {"error_code": e.error_code, "details": e.details}
+    ),
+    RateLimitException: HandlerSpec(
+        "RateLimitErrorResponse", "warning", "Rate limit exceeded",
+        lambda e: {"limit": e.limit, "retry_after": e.retry_after},
+        lambda e: {"Retry-After": str(60 if e.retry_after is None else e.retry_after)}
+    ),
+    CircuitBreakerOpenException: HandlerSpec(
+        "CircuitBreakerErrorResponse", "error", "Circuit breaker open",
+        lambda e: {"service": e.service, "details": e.details}
+    ),
+}
+
+# Resolved spec per concrete exception type (subclasses inherit their nearest base's spec)
+_spec_cache: Dict[type, HandlerSpec] = {}
+
+
+def _resolve_spec(exc_type: type) -> HandlerSpec:
+    """
+    Find the HANDLER_TABLE entry for an exception type by walking its MRO.
+
     Args:
-        request: FastAPI request
-        exc: Validation exception
-    
+        exc_type: Concrete exception class
+
     Returns:
-        JSON response with validation error details
+        Handler spec of the closest registered base class
     """
-    request_id = str(uuid.uuid4())
-    
-    # Handle Pydantic validation errors
-    if isinstance(exc, RequestValidationError):
-        validation_errors = []
-        for error in exc.errors():
-            validation_errors.append(
-                ErrorDetail(
-                    field=".".join(str(loc) for loc in error["loc"]),
-                    message=error["msg"],
-                    type=error["type"]
-                )
-            )
-        
-        error_response = ValidationErrorResponse(
-            message="Request validation failed",
-            validation_errors=validation_errors,
-            path=request.url.path,
-            request_id=request_id
+    spec = _spec_cache.get(exc_type)
+    if spec is None:
+        spec = next(
+            HANDLER_TABLE[cls] for cls in exc_type.__mro__ if cls in HANDLER_TABLE
         )
-        
-        logger.warning(
-            "Request validation failed",
-            validation_errors=[e.model_dump() for e in validation_errors],
-            path=request.url.path,
-            request_id=request_id
-        )
-    
-    # Handle custom validation exceptions
-    else:
-        error_response = ValidationErrorResponse(
-            error_code=exc.error_code,
-            message=exc.message,
-            details=exc.details,
-            path=request.url.path,
-            request_id=request_id
-        )
-        
-        logger.warning(
-            "Validation exception occurred",
-            error_code=exc.error_code,
-            message=exc.message,
-            path=request.url.path,
-            request_id=request_id
-        )
-    
-    # Record error metric
-    record_error(
-        error_type="VALIDATION_ERROR",
-        endpoint=request.url.path,
-        status_code=status.HTTP_400_BAD_REQUEST
-    )
-    
-    return JSONResponse(
-        status_code=status.HTTP_400_BAD_REQUEST,
-        content=error_response.model_dump()
-    )
+        _spec_cache[exc_type] = spec
+    return spec
 
 
-async def rate_limit_exception_handler(
+async def unified_exception_handler(
     request: Request,
-    exc: RateLimitException
-) -> JSONResponse:
+    exc: DataHubException
+):
     """
-    Handle rate limit exceptions.
-    
+    Handle DataHubException and all its subclasses via HANDLER_TABLE.
+
     Args:
         request: FastAPI request
-        exc: Rate limit exception
-    
+        exc: DataHub exception
+
     Returns:
-        JSON response with rate limit error details
+        JSON response with error details
     """
-    request_id = str(uuid.uuid4())
-    
+    request_id = get_request_id(request)
+    path = request.scope["path"]
+    now = _request_now(request)
+    spec = _resolve_spec(type(exc))
+    fields = spec.fields(exc)
+
     # Log the error
-    logger.warning(
-        "Rate limit exceeded",
-        error_code=exc.error_code,
-        message=exc.message,
-        limit=exc.details.get("limit"),
-        retry_after=exc.details.get("retry_after"),
-        path=request.url.path,
-        request_id=request_id
-    )
-    
+    if _log_enabled(spec.log_level):
+        getattr(logger, spec.log_level)(
+            spec.log_event,
+            error_code=exc.error_code,
+            message=exc.message,
+            details=exc.details,
+            path=path,
+            request_id=request_id
+        )
+
     # Record error metric
     record_error(
         error_type=exc.error_code,
-        endpoint=request.url.path,
+        endpoint=route_label(request),
         status_code=exc.status_code
     )
-    
-    # Create error response
-    error_response = RateLimitErrorResponse(
+
+    headers = {REQUEST_ID_HEADER: request_id}
+    if spec.headers:
+        headers.update(spec.headers(exc))
+
+    if spec.response_model is None:
+        return ORJSONResponse(
+            status_code=exc.status_code,
+            content=_error_body(exc.error_code, exc.message, path, request_id, now, exc.details),
+            headers=headers
+        )
+
+    error_response = _lazy(spec.response_model)(
         message=exc.message,
-        limit=exc.details.get("limit"),
-        retry_after=exc.details.get("retry_after"),
-        path=request.url.path,
-        request_id=request_id
+        path=path,
+        request_id=request_id,
+        timestamp=now,
+        **fields
     )
-    
-    return JSONResponse(
+
+    # mode="json" renders the timestamp (and any other non-JSON types) as strings
+    return ORJSONResponse(
         status_code=exc.status_code,
-        content=error_response.model_dump(),
-        headers={"Retry-After": str(exc.details.get("retry_after", 60))}
+        content=error_response.model_dump(mode="json"),
+        headers=headers
     )
 
 
-async def circuit_breaker_exception_handler(
+async def validation_exception_handler(
     request: Request,
-    exc: CircuitBreakerOpenException
-) -> JSONResponse:
+    exc: RequestValidationError
+) -> ORJSONResponse:
     """
-    Handle circuit breaker exceptions.
+    Handle request validation errors raised by FastAPI/Pydantic.
     
     Args:
         request: FastAPI request
-        exc: Circuit breaker exception
+        exc: Request validation error
     
     Returns:
-        JSON response with circuit breaker error details
+        JSON response with validation error details
     """
-    request_id = str(uuid.uuid4())
+    request_id = get_request_id(request)
+    path = request.scope["path"]
     
-    # Log the error
-    logger.error(
-        "Circuit breaker open",
-        error_code=exc.error_code,
-        message=exc.message,
-        service=exc.details.get("service"),
-        path=request.url.path,
-        request_id=request_id
-    )
+    # Single pass: plain dicts are both logged and returned
+    validation_errors = [
+        {"field": ".".join(map(str, error["loc"])), "message": error["msg"], "type": error["type"]}
+        for error in exc.errors()
+    ]
+    
+    if _log_enabled("warning"):
+        logger.warning(
+            "Request validation failed",
+            validation_errors=validation_errors,
+            path=path,
+            request_id=request_id
+        )
     
     # Record error metric
     record_error(
-        error_type=exc.error_code,
-        endpoint=request.url.path,
-        status_code=exc.status_code
+        error_type="VALIDATION_ERROR",
+        endpoint=route_label(request),
+        status_code=status.HTTP_400_BAD_REQUEST
     )
     
-    # Create error response
-    error_response = CircuitBreakerErrorResponse(
-        message=exc.message,
-        service=exc.details.get("service"),
-        details=exc.details,
-        path=request.url.path,
-        request_id=request_id
+    content = _error_body(
+        "VALIDATION_ERROR", "Request validation failed", path, request_id, _request_now(request)
     )
+    content["validation_errors"] = validation_errors
     
-    return JSONResponse(
-        status_code=exc.status_code,
-        content=error_response.model_dump()
+    return ORJSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content=content,
+        headers={REQUEST_ID_HEADER: request_id}
     )
 
 
 async def http_exception_handler(
     request: Request,
     exc: StarletteHTTPException
-) -> JSONResponse:
+) -> Response:
     """
     Handle HTTP exceptions.
     
@@ -315,42 +303,46 @@ async def http_exception_handler(
     Returns:
         JSON response with error details
     """
-    request_id = str(uuid.uuid4())
+    request_id = get_request_id(request)
+    path = request.scope["path"]
     
     # Log the error
-    logger.warning(
-        "HTTP exception occurred",
-        status_code=exc.status_code,
-        detail=exc.detail,
-        path=request.url.path,
-        request_id=request_id
-    )
+    if _log_enabled("warning"):
+        logger.warning(
+            "HTTP exception occurred",
+            status_code=exc.status_code,
+            detail=exc.detail,
+            path=path,
+            request_id=request_id
+        )
     
     # Record error metric
     record_error(
         error_type="HTTP_ERROR",
-        endpoint=request.url.path,
+        endpoint=route_label(request),
         status_code=exc.status_code
     )
     
-    # Create error response
-    error_response = ErrorResponse(
-        error_code=f"HTTP_{exc.status_code}",
-        message=exc.detail,
-        path=request.url.path,
-        request_id=request_id
+    body = _HTTP_ERROR_TEMPLATE % (
+        exc.status_code,
+        orjson.dumps(exc.detail),
+        orjson.dumps(path),
+        orjson.dumps(request_id),
+        _request_now(request).isoformat().encode()
     )
     
-    return JSONResponse(
+    return Response(
+        content=body,
         status_code=exc.status_code,
-        content=error_response.model_dump()
+        media_type="application/json",
+        headers={REQUEST_ID_HEADER: request_id}
     )
 
 
 async def generic_exception_handler(
     request: Request,
     exc: Exception
-) -> JSONResponse:
+) -> ORJSONResponse:
     """
     Handle generic exceptions (fallback handler).
     
@@ -361,35 +353,36 @@ async def generic_exception_handler(
     Returns:
         JSON response with error details
     """
-    request_id = str(uuid.uuid4())
+    request_id = get_request_id(request)
+    path = request.scope["path"]
     
     # Log the error
-    logger.error(
-        "Unhandled exception occurred",
-        exception_type=type(exc).__name__,
-        exception_message=str(exc),
-        path=request.url.path,
-        request_id=request_id,
-        exc_info=True
-    )
+    if _log_enabled("error"):
+        # The traceback carries the message; exc_info is rendered by the log listener
+        logger.error(
+            "Unhandled exception occurred",
+            exception_type=exc.__class__.__name__,
+            path=path,
+            request_id=request_id,
+            exc_info=exc
+        )
     
     # Record error metric
     record_error(
         error_type="INTERNAL_ERROR",
-        endpoint=request.url.path,
+        endpoint=route_label(request),
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
     )
     
-    # Create error response (don't expose internal details)
-    error_response = ErrorResponse(
-        error_code="INTERNAL_ERROR",
-        message="An internal error occurred. Please try again later.",
-        path=request.url.path,
-        request_id=request_id
-    )
-    
-    return JSONResponse(
+    # Don't expose internal details
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content=error_response.model_dump()
+        content=_error_body(
+            "INTERNAL_ERROR",
+            "An internal error occurred. Please try again later.",
+            path,
+            request_id,
+            _request_now(request)
+        ),
+        headers={REQUEST_ID_HEADER: request_id}
     )
-
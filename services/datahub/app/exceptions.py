@@ -3,23 +3,49 @@ DataHub Service Custom Exceptions
 
 Defines a unified exception hierarchy for the DataHub service.
 All custom exceptions inherit from DataHubException.
+
+Subclasses are declarative: class attributes describe the default error
+code and status, the constructor arguments copied into ``details`` and any
+constant details. DataHubException.__init_subclass__ builds one flat
+``__init__`` per subclass from them, so raising any exception runs a single
+Python constructor frame instead of a super().__init__ chain.
+
+Detail arguments and fixed details are also exposed as attributes (e.g.
+``exc.provider``, ``exc.retry_after``), so handlers don't look them up in
+``details``.
 """
 
-from typing import Optional, Dict, Any
+from types import MappingProxyType
+from typing import Optional, Dict, Any, FrozenSet, Mapping, Tuple
 from shared.utils.exceptions import BaseServiceException
 
 
 class DataHubException(BaseServiceException):
     """
     Base exception for all DataHub service errors.
-    
+
     Attributes:
         message: Human-readable error message
         error_code: Machine-readable error code
         details: Additional error details
         status_code: HTTP status code (default: 500)
+
+    Subclass declaration attributes:
+        _error_code: Default error code
+        _status_code: Default HTTP status code
+        _detail_args: Constructor arguments (after message) stored in details
+            and as instance attributes (None when omitted)
+        _optional_args: Subset of _detail_args that may be omitted
+        _fixed_details: Constant details added to every instance, also set
+            as class attributes
     """
-    
+
+    _error_code: str = "DATAHUB_ERROR"
+    _status_code: int = 500
+    _detail_args: Tuple[str, ...] = ()
+    _optional_args: FrozenSet[str] = frozenset()
+    _fixed_details: Mapping[str, Any] = MappingProxyType({})
+
     def __init__(
         self,
         message: str,
@@ -29,250 +55,208 @@ class DataHubException(BaseServiceException):
     ):
         super().__init__(message, error_code, details, status_code)
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fixed_details = MappingProxyType(dict(cls._fixed_details))
+        for name, value in cls._fixed_details.items():
+            setattr(cls, name, value)
+        cls.__init__ = _build_init(cls)
+
+
+def _build_init(cls):
+    """
+    Build the flat ``__init__`` for a DataHubException subclass.
+
+    The generated signature is
+    ``(message, *detail_args, error_code=..., details=None, status_code=...)``,
+    matching the positional order of the hand-written constructors it replaces.
+    ``details`` is always a plain dict owned by the instance (fixed details
+    are copied into it), as BedrockException documents.
+    """
+    detail_args = cls._detail_args
+    optional_args = cls._optional_args
+    fixed_details = cls._fixed_details
+    default_error_code = cls._error_code
+    default_status_code = cls._status_code
+    arg_order = detail_args + ("error_code", "details", "status_code")
+
+    def __init__(self, message: str, *args, **kwargs):
+        if len(args) > len(arg_order):
+            raise TypeError(f"{cls.__name__}() takes at most {len(arg_order) + 1} positional arguments")
+        values = dict(zip(arg_order, args))
+        for name, value in kwargs.items():
+            if name not in arg_order:
+                raise TypeError(f"{cls.__name__}() got an unexpected keyword argument '{name}'")
+            if name in values:
+                raise TypeError(f"{cls.__name__}() got multiple values for argument '{name}'")
+            values[name] = value
+
+        details = values.get("details")
+        for name in detail_args:
+            value = values.get(name)
+            setattr(self, name, value)
+            if value is None:
+                if name not in optional_args:
+                    raise TypeError(f"{cls.__name__}() missing required argument: '{name}'")
+                continue
+            if details is None:
+                details = {}
+            details[name] = value
+
+        if details is None:
+            details = dict(fixed_details)
+        elif fixed_details:
+            details.update(fixed_details)
+
+        # Same state BedrockException/BaseServiceException.__init__ would set
+        self.message = message
+        self.error_code = values.get("error_code") or default_error_code
+        self.details = details
+        self.status_code = values.get("status_code") or default_status_code
+        Exception.__init__(self, message)
+
+    __init__.__qualname__ = f"{cls.__qualname__}.__init__"
+    __init__.__doc__ = f"Initialize {cls.__name__} (generated from class attributes)."
+    return __init__
+
 
 class ExternalAPIException(DataHubException):
     """
     Exception raised when external API calls fail.
-    
+
     Used for errors from Binance, Bitquery, and other external services.
     """
-    
-    def __init__(
-        self,
-        message: str,
-        provider: str,
-        error_code: str = "EXTERNAL_API_ERROR",
-        details: Optional[Dict[str, Any]] = None,
-        status_code: int = 502
-    ):
-        details = details or {}
-        details["provider"] = provider
-        super().__init__(message, error_code, details, status_code)
+
+    _error_code = "EXTERNAL_API_ERROR"
+    _status_code = 502
+    _detail_args = ("provider",)
 
 
 class BinanceAPIException(ExternalAPIException):
     """Exception raised when Binance API calls fail."""
-    
-    def __init__(
-        self,
-        message: str,
-        error_code: str = "BINANCE_API_ERROR",
-        details: Optional[Dict[str, Any]] = None
-    ):
-        super().__init__(message, "binance", error_code, details)
+
+    _error_code = "BINANCE_API_ERROR"
+    _detail_args = ()
+    _fixed_details = {"provider": "binance"}
 
 
 class BitqueryAPIException(ExternalAPIException):
     """Exception raised when Bitquery API calls fail."""
-    
-    def __init__(
-        self,
-        message: str,
-        error_code: str = "BITQUERY_API_ERROR",
-        details: Optional[Dict[str, Any]] = None
-    ):
-        super().__init__(message, "bitquery", error_code, details)
+
+    _error_code = "BITQUERY_API_ERROR"
+    _detail_args = ()
+    _fixed_details = {"provider": "bitquery"}
 
 
 class DataCollectionException(DataHubException):
     """
     Exception raised during data collection operations.
-    
+
     Used for errors in K-line or on-chain data collection.
     """
-    
-    def __init__(
-        self,
-        message: str,
-        collection_type: str,
-        error_code: str = "DATA_COLLECTION_ERROR",
-        details: Optional[Dict[str, Any]] = None,
-        status_code: int = 500
-    ):
-        details = details or {}
-        details["collection_type"] = collection_type
-        super().__init__(message, error_code, details, status_code)
+
+    _error_code = "DATA_COLLECTION_ERROR"
+    _detail_args = ("collection_type",)
 
 
 class KLineCollectionException(DataCollectionException):
     """Exception raised during K-line data collection."""
-    
-    def __init__(
-        self,
-        message: str,
-        symbol: str,
-        interval: str,
-        error_code: str = "KLINE_COLLECTION_ERROR",
-        details: Optional[Dict[str, Any]] = None
-    ):
-        details = details or {}
-        details.update({"symbol": symbol, "interval": interval})
-        super().__init__(message, "kline", error_code, details)
+
+    _error_code = "KLINE_COLLECTION_ERROR"
+    _detail_args = ("symbol", "interval")
+    _fixed_details = {"collection_type": "kline"}
 
 
 class OnChainCollectionException(DataCollectionException):
     """Exception raised during on-chain data collection."""
-    
-    def __init__(
-        self,
-        message: str,
-        symbol: str,
-        network: str,
-        error_code: str = "ONCHAIN_COLLECTION_ERROR",
-        details: Optional[Dict[str, Any]] = None
-    ):
-        details = details or {}
-        details.update({"symbol": symbol, "network": network})
-        super().__init__(message, "onchain", error_code, details)
+
+    _error_code = "ONCHAIN_COLLECTION_ERROR"
+    _detail_args = ("symbol", "network")
+    _fixed_details = {"collection_type": "onchain"}
 
 
 class ValidationException(DataHubException):
     """
     Exception raised when input validation fails.
-    
+
     Used for invalid parameters, missing required fields, etc.
     """
-    
-    def __init__(
-        self,
-        message: str,
-        field: Optional[str] = None,
-        error_code: str = "VALIDATION_ERROR",
-        details: Optional[Dict[str, Any]] = None,
-        status_code: int = 400
-    ):
-        details = details or {}
-        if field:
-            details["field"] = field
-        super().__init__(message, error_code, details, status_code)
+
+    _error_code = "VALIDATION_ERROR"
+    _status_code = 400
+    _detail_args = ("field",)
+    _optional_args = frozenset({"field"})
 
 
 class DatabaseException(DataHubException):
     """
     Exception raised when database operations fail.
-    
+
     Used for connection errors, query errors, transaction errors, etc.
     """
-    
-    def __init__(
-        self,
-        message: str,
-        operation: Optional[str] = None,
-        error_code: str = "DATABASE_ERROR",
-        details: Optional[Dict[str, Any]] = None,
-        status_code: int = 500
-    ):
-        details = details or {}
-        if operation:
-            details["operation"] = operation
-        super().__init__(message, error_code, details, status_code)
+
+    _error_code = "DATABASE_ERROR"
+    _detail_args = ("operation",)
+    _optional_args = frozenset({"operation"})
 
 
 class CacheException(DataHubException):
     """
     Exception raised when cache operations fail.
-    
+
     Used for Redis connection errors, cache read/write errors, etc.
     """
-    
-    def __init__(
-        self,
-        message: str,
-        operation: Optional[str] = None,
-        error_code: str = "CACHE_ERROR",
-        details: Optional[Dict[str, Any]] = None,
-        status_code: int = 500
-    ):
-        details = details or {}
-        if operation:
-            details["operation"] = operation
-        super().__init__(message, error_code, details, status_code)
+
+    _error_code = "CACHE_ERROR"
+    _detail_args = ("operation",)
+    _optional_args = frozenset({"operation"})
 
 
 class RateLimitException(DataHubException):
     """
     Exception raised when rate limits are exceeded.
-    
+
     Used for API rate limiting, request throttling, etc.
     """
-    
-    def __init__(
-        self,
-        message: str,
-        limit: Optional[int] = None,
-        retry_after: Optional[int] = None,
-        error_code: str = "RATE_LIMIT_EXCEEDED",
-        details: Optional[Dict[str, Any]] = None,
-        status_code: int = 429
-    ):
-        details = details or {}
-        if limit:
-            details["limit"] = limit
-        if retry_after:
-            details["retry_after"] = retry_after
-        super().__init__(message, error_code, details, status_code)
+
+    _error_code = "RATE_LIMIT_EXCEEDED"
+    _status_code = 429
+    _detail_args = ("limit", "retry_after")
+    _optional_args = frozenset({"limit", "retry_after"})
 
 
 class CircuitBreakerOpenException(DataHubException):
     """
     Exception raised when circuit breaker is open.
-    
+
     Used to prevent cascading failures when external services are down.
     """
-    
-    def __init__(
-        self,
-        message: str,
-        service: str,
-        error_code: str = "CIRCUIT_BREAKER_OPEN",
-        details: Optional[Dict[str, Any]] = None,
-        status_code: int = 503
-    ):
-        details = details or {}
-        details["service"] = service
-        super().__init__(message, error_code, details, status_code)
+
+    _error_code = "CIRCUIT_BREAKER_OPEN"
+    _status_code = 503
+    _detail_args = ("service",)
 
 
 class ResourceNotFoundException(DataHubException):
     """
     Exception raised when a requested resource is not found.
-    
+
     Used for missing K-lines, missing on-chain data, etc.
     """
-    
-    def __init__(
-        self,
-        message: str,
-        resource_type: str,
-        resource_id: Optional[str] = None,
-        error_code: str = "RESOURCE_NOT_FOUND",
-        details: Optional[Dict[str, Any]] = None,
-        status_code: int = 404
-    ):
-        details = details or {}
-        details["resource_type"] = resource_type
-        if resource_id:
-            details["resource_id"] = resource_id
-        super().__init__(message, error_code, details, status_code)
+
+    _error_code = "RESOURCE_NOT_FOUND"
+    _status_code = 404
+    _detail_args = ("resource_type", "resource_id")
+    _optional_args = frozenset({"resource_id"})
 
 
 class ConfigurationException(DataHubException):
     """
     Exception raised when configuration is invalid or missing.
-    
+
     Used for missing environment variables, invalid settings, etc.
     """
-    
-    def __init__(
-        self,
-        message: str,
-        config_key: Optional[str] = None,
-        error_code: str = "CONFIGURATION_ERROR",
-        details: Optional[Dict[str, Any]] = None,
-        status_code: int = 500
-    ):
-        details = details or {}
-        if config_key:
-            details["config_key"] = config_key
-        super().__init__(message, error_code, details, status_code)
 
+    _error_code = "CONFIGURATION_ERROR"
+    _detail_args = ("config_key",)
+    _optional_args = frozenset({"config_key"})
@@ -2,6 +2,7 @@
 DataHub Service - Main Application Entry Point
 """
 
+import asyncio
 import os
 import sys
 from contextlib import asynccontextmanager
@@ -9,6 +10,7 @@ from dotenv import load_dotenv
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 # Load environment variables
 load_dotenv()
@@ -16,23 +18,19 @@ load_dotenv()
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
-from shared.utils.logger import setup_logging
-from shared.utils.database import engine, Base
+from shared.utils.logger import setup_logging, start_log_listener, stop_log_listener
+from shared.utils.database import engine, Base, close_async_db
 from services.datahub.app.api import health, klines, onchain
-from services.datahub.app.middleware import RequestLoggingMiddleware, PrometheusMetricsMiddleware, get_metrics
-from services.datahub.app.exceptions import (
-    DataHubException,
-    ExternalAPIException,
-    ValidationException,
-    RateLimitException,
-    CircuitBreakerOpenException
+from services.datahub.app.middleware import (
+    RequestLoggingMiddleware,
+    PrometheusMetricsMiddleware,
+    get_metrics,
+    error_flush_loop
 )
+from services.datahub.app.exceptions import DataHubException
 from services.datahub.app.error_handlers import (
-    datahub_exception_handler,
-    external_api_exception_handler,
+    unified_exception_handler,
     validation_exception_handler,
-    rate_limit_exception_handler,
-    circuit_breaker_exception_handler,
     http_exception_handler,
     generic_exception_handler
 )
@@ -49,6 +47,7 @@ async def lifespan(app: FastAPI):
     Lifespan context manager for startup and shutdown events.
     """
     # Startup
+    start_log_listener()
     logger.info("Starting DataHub Service...")
     
     # Create database tables
@@ -59,10 +58,28 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to create database tables: {e}")
         raise
     
+    # Flush buffered error metrics in the background
+    error_flush_task = asyncio.create_task(error_flush_loop())
+    
+    # Evict in-process latest on-chain metrics when collectors publish new data
+    latest_invalidation_task = asyncio.create_task(onchain.latest_invalidation_loop())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down DataHub Service...")
+    for task in (error_flush_task, latest_invalidation_task):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    if onchain.get_bitquery_adapter.cache_info().currsize:
+        onchain.get_bitquery_adapter().close()
+    if klines.get_binance_adapter.cache_info().currsize:
+        await klines.get_binance_adapter().aclose()
+    await close_async_db()
+    stop_log_listener()
 
 
 # Create FastAPI application
@@ -73,10 +90,18 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Configure CORS
+# Configure CORS: comma-separated DATAHUB_CORS_ORIGINS, default "*".
+# Credentials stay allowed (as before the setting existed); set explicit
+# origins in production so Origin isn't echoed for every site.
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("DATAHUB_CORS_ORIGINS", "*").split(",")
+    if origin.strip()
+] or ["*"]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify exact origins
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -88,12 +113,18 @@ app.add_middleware(RequestLoggingMiddleware)
 # Add Prometheus metrics middleware
 app.add_middleware(PrometheusMetricsMiddleware)
 
+# Compress large responses (K-line lists are highly repetitive JSON)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Register exception handlers
-app.add_exception_handler(DataHubException, datahub_exception_handler)
-app.add_exception_handler(ExternalAPIException, external_api_exception_handler)
-app.add_exception_handler(ValidationException, validation_exception_handler)
-app.add_exception_handler(RateLimitException, rate_limit_exception_handler)
-app.add_exception_handler(CircuitBreakerOpenException, circuit_breaker_exception_handler)
+app.add_exception_handler(DataHubException, unified_exception_handler)
+# Register every subclass as well: Starlette tries an exact type(exc) lookup
+# before walking the MRO, so exact registrations resolve in one dict lookup
+_exception_types = DataHubException.__subclasses__()
+while _exception_types:
+    _exc_type = _exception_types.pop()
+    app.add_exception_handler(_exc_type, unified_exception_handler)
+    _exception_types.extend(_exc_type.__subclasses__())
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(StarletteHTTPException, http_exception_handler)
 app.add_exception_handler(Exception, generic_exception_handler)
@@ -128,7 +159,7 @@ async def metrics():
 
     Exposes application metrics in Prometheus format for monitoring.
     """
-    return get_metrics()
+    return await get_metrics()
 
 
 if __name__ == "__main__":
@@ -3,14 +3,19 @@ DataHub Service Middleware
 """
 
 from .request_logging import RequestLoggingMiddleware
+from .request_id import REQUEST_ID_HEADER, new_request_id, get_request_id
 from .prometheus_metrics import (
     PrometheusMetricsMiddleware,
     get_metrics,
+    route_label,
+    ALL_LABEL,
     record_kline_collection,
     record_onchain_collection,
     record_database_query,
     record_external_api_call,
     record_error,
+    flush_pending_errors,
+    error_flush_loop,
     update_error_rate,
     update_circuit_breaker_state,
     record_circuit_breaker_failure
@@ -18,13 +23,20 @@ from .prometheus_metrics import (
 
 __all__ = [
     "RequestLoggingMiddleware",
+    "REQUEST_ID_HEADER",
+    "new_request_id",
+    "get_request_id",
     "PrometheusMetricsMiddleware",
     "get_metrics",
+    "route_label",
+    "ALL_LABEL",
     "record_kline_collection",
     "record_onchain_collection",
     "record_database_query",
     "record_external_api_call",
     "record_error",
+    "flush_pending_errors",
+    "error_flush_loop",
     "update_error_rate",
     "update_circuit_breaker_state",
     "record_circuit_breaker_failure"
@@ -4,93 +4,229 @@ Prometheus Metrics Middleware
 Collects and exposes application metrics for Prometheus monitoring.
 """
 
+import asyncio
+import os
+import re
+import sys
 import time
-from typing import Callable
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, FrozenSet, Set, Tuple
 from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from prometheus_client import CollectorRegistry, Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
 
 from shared.utils.logger import setup_logging
 
 logger = setup_logging("prometheus_metrics")
 
 
+# DataHub's own registry: /metrics serializes only these metrics, not the
+# default registry's process/platform/GC collectors
+REGISTRY = CollectorRegistry()
+
 # Define Prometheus metrics
+# Histogram buckets follow each operation's expected latency range
+# (requests 10ms-10s, DB queries 1ms-5s, external APIs 50ms-30s)
 REQUEST_COUNT = Counter(
     "datahub_http_requests_total",
     "Total HTTP requests",
-    ["method", "endpoint", "status_code"]
+    ["method", "endpoint", "status_class"],
+    registry=REGISTRY
 )
 
 REQUEST_DURATION = Histogram(
     "datahub_http_request_duration_seconds",
     "HTTP request duration in seconds",
-    ["method", "endpoint"]
+    ["method", "endpoint"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=REGISTRY
 )
 
 REQUEST_IN_PROGRESS = Gauge(
     "datahub_http_requests_in_progress",
     "HTTP requests currently in progress",
-    ["method", "endpoint"]
+    ["method", "endpoint"],
+    registry=REGISTRY
 )
 
 KLINE_COLLECTION_COUNT = Counter(
     "datahub_kline_collections_total",
     "Total K-line data collections",
-    ["symbol", "interval", "status"]
+    ["symbol", "interval", "status"],
+    registry=REGISTRY
 )
 
 ONCHAIN_COLLECTION_COUNT = Counter(
     "datahub_onchain_collections_total",
     "Total on-chain data collections",
-    ["symbol", "network", "type", "status"]
+    ["symbol", "network", "type", "status"],
+    registry=REGISTRY
 )
 
 DATABASE_QUERY_DURATION = Histogram(
     "datahub_database_query_duration_seconds",
     "Database query duration in seconds",
-    ["operation"]
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+    registry=REGISTRY
 )
 
 EXTERNAL_API_CALL_COUNT = Counter(
     "datahub_external_api_calls_total",
     "Total external API calls",
-    ["provider", "status"]
+    ["provider", "status"],
+    registry=REGISTRY
 )
 
 EXTERNAL_API_CALL_DURATION = Histogram(
     "datahub_external_api_call_duration_seconds",
     "External API call duration in seconds",
-    ["provider"]
+    ["provider"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    registry=REGISTRY
 )
 
 ERROR_COUNT = Counter(
     "datahub_errors_total",
     "Total errors by type and endpoint",
-    ["error_type", "endpoint", "status_code"]
+    ["error_type", "endpoint", "status_class"],
+    registry=REGISTRY
 )
 
 ERROR_RATE = Gauge(
     "datahub_error_rate",
     "Current error rate by endpoint",
-    ["endpoint"]
+    ["endpoint"],
+    registry=REGISTRY
 )
 
 CIRCUIT_BREAKER_STATE = Gauge(
     "datahub_circuit_breaker_state",
     "Circuit breaker state (0=closed, 1=half-open, 2=open)",
-    ["service"]
+    ["service"],
+    registry=REGISTRY
 )
 
 CIRCUIT_BREAKER_FAILURES = Counter(
     "datahub_circuit_breaker_failures_total",
     "Total circuit breaker failures",
-    ["service"]
+    ["service"],
+    registry=REGISTRY
 )
 
 
-class PrometheusMetricsMiddleware(BaseHTTPMiddleware):
+# Error counts buffered by record_error() and applied to ERROR_COUNT in batches
+_pending_errors: DefaultDict[Tuple[str, str, str], int] = defaultdict(int)
+
+# Interval (seconds) between flushes of buffered error counts
+ERROR_FLUSH_INTERVAL = 0.1
+
+# Raw paths without a matching route (e.g. 404s) are used as endpoint labels
+# only up to this many distinct values; the rest share OVERFLOW_ENDPOINT
+MAX_UNMATCHED_ENDPOINTS = 256
+OVERFLOW_ENDPOINT = "_overflow"
+_unmatched_endpoints: Set[str] = set()
+
+# Bound child metrics per label values; labels() hashes and locks on every call,
+# while the set of label combinations seen in practice is small
+_child_cache: Dict[Tuple[Any, Tuple[Any, ...]], Any] = {}
+
+# (in-progress gauge, duration histogram) children per (method, endpoint)
+_request_children: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+
+
+def _status_class(status_code: int) -> str:
+    """
+    Bucket an HTTP status code into its class label ("2xx", "4xx", ...).
+
+    Status classes keep the status label at five values per endpoint.
+    """
+    return f"{status_code // 100}xx"
+
+
+def _child(metric, *label_values):
+    """
+    Return metric.labels(*label_values), cached per metric and label values.
+
+    Args:
+        metric: Labelled Prometheus metric
+        label_values: Label values in the metric's label order
+
+    Returns:
+        Bound child metric
+    """
+    key = (metric, label_values)
+    child = _child_cache.get(key)
+    if child is None:
+        child = _child_cache[key] = metric.labels(*label_values)
+    return child
+
+
+# Rendered /metrics payload is reused for this many seconds, so concurrent or
+# back-to-back scrapes don't each serialize the whole registry
+METRICS_CACHE_TTL = float(os.getenv("METRICS_CACHE_TTL", "2"))
+_metrics_cache: Tuple[float, bytes] = (0.0, b"")
+_metrics_lock = asyncio.Lock()
+
+
+# Scrape and probe endpoints excluded from request metrics (health router is
+# mounted at /health with /, /ready and /live)
+_SKIP_PATHS = frozenset({"/metrics", "/health", "/health/", "/health/ready", "/health/live"})
+
+# Known route templates, matched by one precompiled alternation; the name of
+# the matching group selects the template. More specific patterns come first
+# (/v1/onchain/collect/<type> would also match /v1/onchain/{symbol}/{network},
+# /v1/klines/collect/historical would match /v1/klines/{symbol}/{interval}).
+_NORMALIZE_RE = re.compile(
+    r"^(?:"
+    r"(?P<kline_latest>/v1/klines/[^/]+/[^/]+/latest)"
+    r"|(?P<kline_collect>/v1/klines/collect)"
+    r"|(?P<kline_collect_historical>/v1/klines/collect/historical)"
+    r"|(?P<klines>/v1/klines/[^/]+/[^/]+)"
+    r"|(?P<onchain_collect>/v1/onchain/collect/[^/]+)"
+    r"|(?P<onchain_latest>/v1/onchain/[^/]+/[^/]+/latest)"
+    r"|(?P<onchain>/v1/onchain/[^/]+/[^/]+)"
+    r")$"
+)
+
+# Interned so every request labels with the same string objects (hash computed once)
+_NORMALIZED_TEMPLATES = {
+    name: sys.intern(template)
+    for name, template in {
+        "kline_latest": "/v1/klines/{symbol}/{interval}/latest",
+        "kline_collect": "/v1/klines/collect",
+        "kline_collect_historical": "/v1/klines/collect/historical",
+        "klines": "/v1/klines/{symbol}/{interval}",
+        "onchain_latest": "/v1/onchain/{symbol}/{network}/latest",
+        "onchain": "/v1/onchain/{symbol}/{network}",
+    }.items()
+}
+
+
+def _normalize_path(path: str) -> str:
+    """
+    Normalize path by replacing dynamic segments with placeholders.
+    
+    Examples:
+    - /v1/klines/BTCUSDT/1h -> /v1/klines/{symbol}/{interval}
+    - /v1/onchain/BTC/eth -> /v1/onchain/{symbol}/{network}
+    
+    Args:
+        path: Original request path
+    
+    Returns:
+        Normalized path
+    """
+    match = _NORMALIZE_RE.match(path)
+    if match is None:
+        # Default: return as-is
+        return path
+    
+    # Collect endpoints keep their concrete collection type
+    return _NORMALIZED_TEMPLATES.get(match.lastgroup, path)
+
+
+class PrometheusMetricsMiddleware:
     """
     Middleware to collect Prometheus metrics for HTTP requests.
     
@@ -98,161 +234,223 @@ class PrometheusMetricsMiddleware(BaseHTTPMiddleware):
     - Request count by method, endpoint, status code
     - Request duration by method, endpoint
     - Requests in progress by method, endpoint
+
+    Implemented as plain ASGI middleware; the status code is captured from
+    the http.response.start message.
     """
     
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Process the request and collect metrics.
         
         Args:
-            request: Incoming HTTP request
-            call_next: Next middleware/handler in chain
-        
-        Returns:
-            HTTP response
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
-        # Skip metrics endpoint itself
-        if request.url.path == "/metrics":
-            return await call_next(request)
+        # Skip non-HTTP traffic, the metrics endpoint itself and health probes
+        if scope["type"] != "http" or scope["path"] in _SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
         
-        method = request.method
-        path = request.url.path
+        method = scope["method"]
+        path = scope["path"]
         
         # Normalize path (replace IDs with placeholders)
-        normalized_path = self._normalize_path(path)
+        normalized_path = _normalize_path(path)
         
-        # Increment in-progress gauge
-        REQUEST_IN_PROGRESS.labels(method=method, endpoint=normalized_path).inc()
+        # Bound in-progress/duration children for this method and endpoint
+        key = (method, normalized_path)
+        children = _request_children.get(key)
+        if children is None:
+            children = _request_children[key] = (
+                REQUEST_IN_PROGRESS.labels(method=method, endpoint=normalized_path),
+                REQUEST_DURATION.labels(method=method, endpoint=normalized_path)
+            )
+        in_progress, request_duration = children
+        
+        status_code = 500
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
         
-        # Start timer
-        start_time = time.time()
+        # Increment in-progress gauge
+        in_progress.inc()
         
         try:
-            # Process request
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration = time.time() - start_time
-            
-            # Record metrics
-            REQUEST_COUNT.labels(
-                method=method,
-                endpoint=normalized_path,
-                status_code=response.status_code
-            ).inc()
-            
-            REQUEST_DURATION.labels(
-                method=method,
-                endpoint=normalized_path
-            ).observe(duration)
-            
-            return response
-            
-        except Exception as e:
-            # Calculate duration
-            duration = time.time() - start_time
-            
+            # Process request; the histogram timer observes the duration on
+            # exit, including when the app raises
+            with request_duration.time():
+                await self.app(scope, receive, send_wrapper)
+        except Exception:
             # Record error metrics
-            REQUEST_COUNT.labels(
-                method=method,
-                endpoint=normalized_path,
-                status_code=500
-            ).inc()
-            
-            REQUEST_DURATION.labels(
-                method=method,
-                endpoint=normalized_path
-            ).observe(duration)
-            
-            # Re-raise exception
+            status_code = 500
             raise
-            
         finally:
+            # Record metrics
+            _child(REQUEST_COUNT, method, normalized_path, _status_class(status_code)).inc()
+            
             # Decrement in-progress gauge
-            REQUEST_IN_PROGRESS.labels(method=method, endpoint=normalized_path).dec()
-    
-    def _normalize_path(self, path: str) -> str:
-        """
-        Normalize path by replacing dynamic segments with placeholders.
-        
-        Examples:
-        - /v1/klines/BTCUSDT/1h -> /v1/klines/{symbol}/{interval}
-        - /v1/onchain/BTC/eth -> /v1/onchain/{symbol}/{network}
-        
-        Args:
-            path: Original request path
-        
-        Returns:
-            Normalized path
-        """
-        parts = path.split("/")
-        
-        # K-lines endpoints
-        if len(parts) >= 4 and parts[1] == "v1" and parts[2] == "klines":
-            if len(parts) == 4:
-                return "/v1/klines/{symbol}/{interval}"
-            elif len(parts) == 5 and parts[4] == "latest":
-                return "/v1/klines/{symbol}/{interval}/latest"
-            elif parts[3] == "collect":
-                return "/v1/klines/collect"
-        
-        # On-chain endpoints
-        if len(parts) >= 4 and parts[1] == "v1" and parts[2] == "onchain":
-            if parts[3] == "collect":
-                return f"/v1/onchain/collect/{parts[4]}" if len(parts) > 4 else "/v1/onchain/collect"
-            elif len(parts) == 4:
-                return "/v1/onchain/{symbol}/{network}"
-            elif len(parts) == 5 and parts[4] == "latest":
-                return "/v1/onchain/{symbol}/{network}/latest"
-        
-        # Default: return as-is
+            in_progress.dec()
+
+
+def route_label(request: Request) -> str:
+    """
+    Return a low-cardinality endpoint label for a request.
+
+    Uses the matched route template (e.g. /v1/klines/{symbol}/{interval});
+    unmatched paths are kept as-is up to MAX_UNMATCHED_ENDPOINTS distinct
+    values, then collapsed to OVERFLOW_ENDPOINT.
+
+    Args:
+        request: FastAPI request
+
+    Returns:
+        Endpoint label
+    """
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+
+    path = request.scope["path"]
+    if path in _unmatched_endpoints:
         return path
+    if len(_unmatched_endpoints) < MAX_UNMATCHED_ENDPOINTS:
+        _unmatched_endpoints.add(path)
+        return path
+    return OVERFLOW_ENDPOINT
 
 
-def get_metrics() -> Response:
+async def get_metrics() -> Response:
     """
     Generate Prometheus metrics response.
+
+    The rendered registry is cached for METRICS_CACHE_TTL seconds; only one
+    coroutine re-renders at a time while the others wait for its result.
+    Compression is left to the app's GZipMiddleware.
     
     Returns:
         Response with Prometheus metrics in text format
     """
-    metrics_data = generate_latest()
+    global _metrics_cache
+
+    rendered_at, metrics_data = _metrics_cache
+    if time.monotonic() - rendered_at >= METRICS_CACHE_TTL:
+        async with _metrics_lock:
+            rendered_at, metrics_data = _metrics_cache
+            if time.monotonic() - rendered_at >= METRICS_CACHE_TTL:
+                flush_pending_errors()
+                metrics_data = generate_latest(REGISTRY)
+                _metrics_cache = (time.monotonic(), metrics_data)
     return Response(content=metrics_data, media_type=CONTENT_TYPE_LATEST)
 
 
-# Helper functions to record custom metrics
-def record_kline_collection(symbol: str, interval: str, status: str = "success"):
-    """Record K-line collection metric."""
-    KLINE_COLLECTION_COUNT.labels(symbol=symbol, interval=interval, status=status).inc()
+# Allowed label values for the record_* helpers; anything else is recorded as
+# OTHER_LABEL so a stray ID or free-form string can't create new series.
+# Symbols mirror DataCollectorScheduler.KLINE_SYMBOLS and ONCHAIN_PAIRS;
+# ALL_LABEL marks counts aggregated over a whole scheduled run.
+OTHER_LABEL = "other"
+ALL_LABEL = "all"
+_ALLOWED_SYMBOLS = frozenset(["BTCUSDT", "ETHUSDT", "BNBUSDT", "BTC", "ETH", "BNB", ALL_LABEL])
+_ALLOWED_INTERVALS = frozenset([
+    "1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M"
+])
+_ALLOWED_NETWORKS = frozenset(["eth", "bsc", ALL_LABEL])
+_ALLOWED_OPERATIONS = frozenset(["insert", "select", "update", "delete", "upsert"])
+_ALLOWED_PROVIDERS = frozenset(["binance", "binance_futures", "bitquery"])
 
 
-def record_onchain_collection(symbol: str, network: str, collection_type: str, status: str = "success"):
-    """Record on-chain collection metric."""
-    ONCHAIN_COLLECTION_COUNT.labels(symbol=symbol, network=network, type=collection_type, status=status).inc()
+def _bounded(value: str, allowed: FrozenSet[str]) -> str:
+    """Return value if it is an allowed label value, else OTHER_LABEL."""
+    return value if value in allowed else OTHER_LABEL
+
+
+# Helper functions to record custom metrics
+def record_kline_collection(symbol: str, interval: str, status: str = "success", count: int = 1):
+    """Record K-line collection metric (count collections in one increment)."""
+    _child(
+        KLINE_COLLECTION_COUNT,
+        _bounded(symbol, _ALLOWED_SYMBOLS),
+        _bounded(interval, _ALLOWED_INTERVALS),
+        status
+    ).inc(count)
+
+
+def record_onchain_collection(
+    symbol: str,
+    network: str,
+    collection_type: str,
+    status: str = "success",
+    count: int = 1
+):
+    """Record on-chain collection metric (count collections in one increment)."""
+    _child(
+        ONCHAIN_COLLECTION_COUNT,
+        _bounded(symbol, _ALLOWED_SYMBOLS),
+        _bounded(network, _ALLOWED_NETWORKS),
+        collection_type,
+        status
+    ).inc(count)
 
 
 def record_database_query(operation: str, duration: float):
     """Record database query metric."""
-    DATABASE_QUERY_DURATION.labels(operation=operation).observe(duration)
+    _child(DATABASE_QUERY_DURATION, _bounded(operation, _ALLOWED_OPERATIONS)).observe(duration)
 
 
 def record_external_api_call(provider: str, status: str, duration: float):
     """Record external API call metric."""
-    EXTERNAL_API_CALL_COUNT.labels(provider=provider, status=status).inc()
-    EXTERNAL_API_CALL_DURATION.labels(provider=provider).observe(duration)
+    provider = _bounded(provider, _ALLOWED_PROVIDERS)
+    _child(EXTERNAL_API_CALL_COUNT, provider, status).inc()
+    _child(EXTERNAL_API_CALL_DURATION, provider).observe(duration)
 
 
 def record_error(error_type: str, endpoint: str, status_code: int):
-    """Record error metric."""
-    ERROR_COUNT.labels(error_type=error_type, endpoint=endpoint, status_code=status_code).inc()
+    """
+    Record error metric.
+
+    The increment is buffered and applied by flush_pending_errors(), so
+    error storms don't take a metric lock per error.
+    """
+    _pending_errors[(error_type, endpoint, _status_class(status_code))] += 1
+
+
+def flush_pending_errors():
+    """Apply buffered error counts to ERROR_COUNT, one inc() per label set."""
+    global _pending_errors
+
+    if not _pending_errors:
+        return
+
+    pending, _pending_errors = _pending_errors, defaultdict(int)
+    for (error_type, endpoint, status_class), count in pending.items():
+        _child(ERROR_COUNT, error_type, endpoint, status_class).inc(count)
+
+
+async def error_flush_loop(interval: float = ERROR_FLUSH_INTERVAL):
+    """
+    Periodically flush buffered error counts until cancelled.
+
+    Args:
+        interval: Seconds between flushes
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            flush_pending_errors()
+    finally:
+        flush_pending_errors()
 
 
 def update_error_rate(endpoint: str, error_rate: float):
     """Update error rate metric."""
-    ERROR_RATE.labels(endpoint=endpoint).set(error_rate)
+    _child(ERROR_RATE, endpoint).set(error_rate)
 
 
 def update_circuit_breaker_state(service: str, state: int):
@@ -263,10 +461,10 @@ def update_circuit_breaker_state(service: str, state: int):
         service: Service name
         state: 0=closed, 1=half-open, 2=open
     """
-    CIRCUIT_BREAKER_STATE.labels(service=service).set(state)
+    _child(CIRCUIT_BREAKER_STATE, service).set(state)
 
 
 def record_circuit_breaker_failure(service: str):
     """Record circuit breaker failure."""
-    CIRCUIT_BREAKER_FAILURES.labels(service=service).inc()
+    _child(CIRCUIT_BREAKER_FAILURES, service).inc()
 
@@ -0,0 +1,59 @@
+"""
+Request ID Generation
+
+Generates time-ordered UUIDv7 request IDs for error correlation.
+"""
+
+import random
+import threading
+import time
+
+from fastapi import Request
+
+# Per-thread PRNG, seeded once from os.urandom; IDs only need to be unique, not secret
+_local = threading.local()
+
+_RAND_B_MASK = (1 << 62) - 1
+
+# Header used to accept a caller-provided request ID and echo it back
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+def _rng() -> random.Random:
+    """Return this thread's PRNG, creating it on first use."""
+    rng = getattr(_local, "rng", None)
+    if rng is None:
+        rng = _local.rng = random.Random()
+    return rng
+
+
+def new_request_id() -> str:
+    """
+    Generate a UUIDv7 string (48-bit unix ms timestamp, 74 random bits).
+
+    Returns:
+        Dashed lowercase hex UUID, e.g. "018f3c9e-5b2a-7c41-9d3e-0a1b2c3d4e5f"
+    """
+    rand = _rng().getrandbits(74)
+    value = (
+        (time.time_ns() // 1_000_000 & 0xFFFFFFFFFFFF) << 80
+        | 0x7 << 76                      # version
+        | (rand >> 62) << 64             # rand_a (12 bits)
+        | 0x2 << 62                      # RFC 4122 variant
+        | rand & _RAND_B_MASK            # rand_b (62 bits)
+    )
+    h = f"{value:032x}"
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def get_request_id(request: Request) -> str:
+    """
+    Return the request ID already assigned to the request, or mint a new one.
+
+    Args:
+        request: FastAPI request
+
+    Returns:
+        Request ID string
+    """
+    return getattr(request.state, "request_id", None) or new_request_id()
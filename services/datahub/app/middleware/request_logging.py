@@ -4,18 +4,22 @@ Request Logging Middleware
 Logs all HTTP requests for debugging and audit purposes.
 """
 
+import logging
 import time
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from datetime import datetime, timezone
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from shared.utils.logger import setup_logging
+from .request_id import REQUEST_ID_HEADER, new_request_id
 
 logger = setup_logging("request_logger")
 
+# Underlying stdlib logger, used for cheap level checks
+_stdlib_logger = logging.getLogger("request_logger")
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+
+class RequestLoggingMiddleware:
     """
     Middleware to log all HTTP requests and responses.
     
@@ -25,65 +29,82 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
     - Response status code
     - Request processing time
     - Client IP address
+
+    Also assigns request.state.request_id (from the X-Request-ID header, or
+    newly generated) so handlers reuse one ID per request, and echoes it in
+    the response headers. request.state.now holds the request's UTC
+    timestamp, shared by error responses instead of reading the clock again.
+
+    Implemented as plain ASGI middleware (no BaseHTTPMiddleware task and
+    stream wrapping per request); durations use the monotonic
+    time.perf_counter_ns() clock.
     """
     
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Process the request and log details.
         
         Args:
-            request: Incoming HTTP request
-            call_next: Next middleware/handler in chain
-        
-        Returns:
-            HTTP response
+            scope: ASGI connection scope
+            receive: ASGI receive channel
+            send: ASGI send channel
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Start timer
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
+        
+        # Assign the request ID once for logging, handlers and the response
+        # (scope["state"] backs request.state)
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER) or new_request_id()
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        state["now"] = datetime.now(timezone.utc)
         
         # Extract request details
-        method = request.method
-        path = request.url.path
-        query_params = dict(request.query_params)
-        client_ip = request.client.host if request.client else "unknown"
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
         
-        # Log request
-        logger.info(
-            "Incoming request",
-            method=method,
-            path=path,
-            query_params=query_params,
-            client_ip=client_ip
-        )
+        # Skip query parsing and INFO records when INFO is filtered
+        info_enabled = _stdlib_logger.isEnabledFor(logging.INFO)
         
-        # Process request
-        try:
-            response = await call_next(request)
-            
-            # Calculate processing time
-            process_time = time.time() - start_time
-            
-            # Log response
+        # Log request
+        if info_enabled:
             logger.info(
-                "Request completed",
+                "Incoming request",
                 method=method,
                 path=path,
-                status_code=response.status_code,
-                process_time_ms=round(process_time * 1000, 2),
-                client_ip=client_ip
+                query_params=dict(QueryParams(scope["query_string"])),
+                client_ip=client_ip,
+                request_id=request_id
             )
-            
-            # Add custom header with processing time
-            response.headers["X-Process-Time"] = str(process_time)
-            
-            return response
-            
+        
+        status_code = None
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                
+                # Add custom header with processing time
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time"] = f"{(time.perf_counter_ns() - start_ns) / 1e9:.6f}"
+                headers[REQUEST_ID_HEADER] = request_id
+            await send(message)
+        
+        # Process request
+        try:
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             # Calculate processing time
-            process_time = time.time() - start_time
+            process_time_ms = (time.perf_counter_ns() - start_ns) / 1e6
             
             # Log error
             logger.error(
@@ -91,10 +112,23 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 method=method,
                 path=path,
                 error=str(e),
-                process_time_ms=round(process_time * 1000, 2),
-                client_ip=client_ip
+                process_time_ms=round(process_time_ms, 2),
+                client_ip=client_ip,
+                request_id=request_id
             )
             
             # Re-raise exception to be handled by FastAPI
             raise
-
+        
+        # Log response
+        if info_enabled:
+            process_time_ms = (time.perf_counter_ns() - start_ns) / 1e6
+            logger.info(
+                "Request completed",
+                method=method,
+                path=path,
+                status_code=status_code,
+                process_time_ms=round(process_time_ms, 2),
+                client_ip=client_ip,
+                request_id=request_id
+            )
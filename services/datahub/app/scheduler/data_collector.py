@@ -5,22 +5,54 @@ Schedules periodic data collection tasks for K-lines and on-chain metrics.
 """
 
 import asyncio
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any
+from functools import partial
+from typing import Callable, ClassVar, Iterator, Optional, Sequence, Tuple
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy.orm import Session
 
 from shared.utils.logger import setup_logging
 from shared.utils.database import get_db
-from services.datahub.app.services.kline_service import KLineService
+from services.datahub.app.services.kline_service import KLineService, invalidate_kline_caches
 from services.datahub.app.services.onchain_service import OnChainService
 from services.datahub.app.adapters.binance_adapter import BinanceAdapter
 from services.datahub.app.adapters.bitquery_adapter import BitqueryAdapter
+from services.datahub.app.middleware import (
+    ALL_LABEL,
+    record_kline_collection,
+    record_onchain_collection
+)
 
 logger = setup_logging("data_collector_scheduler")
 
 
+@contextmanager
+def _db_session() -> Iterator[Session]:
+    """
+    Open a database session for one collection call and always close it.
+
+    Closing the get_db() generator runs its cleanup, returning the connection
+    to the pool even when the collection raises.
+    """
+    db_gen = get_db()
+    try:
+        yield next(db_gen)
+    finally:
+        db_gen.close()
+
+
+def _record_onchain_run(collection_type: str, success_count: int, error_count: int):
+    """Record one scheduled on-chain run's outcomes, one increment per status."""
+    if success_count:
+        record_onchain_collection(ALL_LABEL, ALL_LABEL, collection_type, "success", success_count)
+    if error_count:
+        record_onchain_collection(ALL_LABEL, ALL_LABEL, collection_type, "error", error_count)
+
+
 class DataCollectorScheduler:
     """
     Scheduler for periodic data collection tasks.
@@ -32,18 +64,53 @@ class DataCollectorScheduler:
     - Log collection statistics
     """
     
-    def __init__(self):
-        """Initialize the scheduler."""
-        self.scheduler = AsyncIOScheduler()
-        self.binance_adapter = BinanceAdapter()
-        self.bitquery_adapter = BitqueryAdapter()
-        
-        # Configuration: symbols and intervals to collect
-        self.kline_symbols = ["BTCUSDT", "ETHUSDT", "BNBUSDT"]
-        self.kline_intervals = ["1m", "5m", "15m", "1h", "4h", "1d"]
+    __slots__ = ("scheduler", "binance_adapter", "bitquery_adapter")
+    
+    # Configuration: symbols and intervals to collect
+    KLINE_SYMBOLS: ClassVar[Tuple[str, ...]] = ("BTCUSDT", "ETHUSDT", "BNBUSDT")
+    KLINE_INTERVALS: ClassVar[Tuple[str, ...]] = ("1m", "5m", "15m", "1h", "4h", "1d")
+    
+    # Historical backfills running at once (bounded by the DB pool and Binance request weight)
+    HISTORICAL_BACKFILL_CONCURRENCY: ClassVar[int] = 4
+    
+    # On-chain (symbol, network) pairs
+    ONCHAIN_PAIRS: ClassVar[Tuple[Tuple[str, str], ...]] = (("BTC", "eth"), ("ETH", "eth"), ("BNB", "bsc"))
+    
+    # K-line jobs: (job id, name, interval, limit, trigger)
+    KLINE_JOBS: ClassVar[Tuple[Tuple[str, str, str, int, BaseTrigger], ...]] = (
+        ("klines_1m_collection", "Collect 1-minute K-lines", "1m", 10, IntervalTrigger(minutes=1)),
+        ("klines_5m_collection", "Collect 5-minute K-lines", "5m", 10, IntervalTrigger(minutes=5)),
+        ("klines_1h_collection", "Collect hourly K-lines", "1h", 24, CronTrigger(minute=0)),
+        ("klines_1d_collection", "Collect daily K-lines", "1d", 30, CronTrigger(hour=0, minute=0)),
+    )
+    
+    # On-chain jobs: (job id, name, collector method, trigger)
+    ONCHAIN_JOBS: ClassVar[Tuple[Tuple[str, str, str, BaseTrigger], ...]] = (
+        ("large_transfers_collection", "Collect large transfers", "_collect_large_transfers",
+         IntervalTrigger(minutes=15)),
+        ("smart_money_collection", "Collect smart money activity", "_collect_smart_money",
+         IntervalTrigger(minutes=30)),
+        ("exchange_netflow_collection", "Collect exchange netflow", "_collect_exchange_netflow",
+         CronTrigger(minute=0)),
+        ("active_addresses_collection", "Collect active addresses", "_collect_active_addresses",
+         CronTrigger(minute=30)),
+    )
+    
+    def __init__(
+        self,
+        binance_adapter: Optional[BinanceAdapter] = None,
+        bitquery_adapter: Optional[BitqueryAdapter] = None
+    ):
+        """
+        Initialize the scheduler.
         
-        self.onchain_symbols = ["BTC", "ETH", "BNB"]
-        self.onchain_networks = {"BTC": "eth", "ETH": "eth", "BNB": "bsc"}
+        Args:
+            binance_adapter: Binance adapter to share (a new one if omitted)
+            bitquery_adapter: Bitquery adapter to share (a new one if omitted)
+        """
+        self.scheduler = AsyncIOScheduler()
+        self.binance_adapter = binance_adapter or BinanceAdapter()
+        self.bitquery_adapter = bitquery_adapter or BitqueryAdapter()
         
         logger.info("DataCollectorScheduler initialized")
     
@@ -69,99 +136,86 @@ class DataCollectorScheduler:
     
     def _schedule_kline_jobs(self):
         """Schedule K-line data collection jobs."""
-        # Collect 1-minute K-lines every minute
-        self.scheduler.add_job(
-            self._collect_klines_1m,
-            trigger=IntervalTrigger(minutes=1),
-            id="klines_1m_collection",
-            name="Collect 1-minute K-lines",
-            replace_existing=True
-        )
-        
-        # Collect 5-minute K-lines every 5 minutes
-        self.scheduler.add_job(
-            self._collect_klines_5m,
-            trigger=IntervalTrigger(minutes=5),
-            id="klines_5m_collection",
-            name="Collect 5-minute K-lines",
-            replace_existing=True
-        )
-        
-        # Collect hourly K-lines every hour
-        self.scheduler.add_job(
-            self._collect_klines_1h,
-            trigger=CronTrigger(minute=0),
-            id="klines_1h_collection",
-            name="Collect hourly K-lines",
-            replace_existing=True
-        )
-        
-        # Collect daily K-lines at midnight
-        self.scheduler.add_job(
-            self._collect_klines_1d,
-            trigger=CronTrigger(hour=0, minute=0),
-            id="klines_1d_collection",
-            name="Collect daily K-lines",
-            replace_existing=True
-        )
+        for job_id, name, interval, limit, trigger in self.KLINE_JOBS:
+            self.scheduler.add_job(
+                partial(self._collect_klines_for_interval, interval, limit=limit),
+                trigger=trigger,
+                id=job_id,
+                name=name,
+                replace_existing=True
+            )
         
         logger.info("K-line collection jobs scheduled")
     
     def _schedule_onchain_jobs(self):
         """Schedule on-chain data collection jobs."""
-        # Collect large transfers every 15 minutes
-        self.scheduler.add_job(
-            self._collect_large_transfers,
-            trigger=IntervalTrigger(minutes=15),
-            id="large_transfers_collection",
-            name="Collect large transfers",
-            replace_existing=True
-        )
+        for job_id, name, method, trigger in self.ONCHAIN_JOBS:
+            self.scheduler.add_job(
+                getattr(self, method),
+                trigger=trigger,
+                id=job_id,
+                name=name,
+                replace_existing=True
+            )
         
-        # Collect smart money activity every 30 minutes
-        self.scheduler.add_job(
-            self._collect_smart_money,
-            trigger=IntervalTrigger(minutes=30),
-            id="smart_money_collection",
-            name="Collect smart money activity",
-            replace_existing=True
-        )
+        logger.info("On-chain collection jobs scheduled")
+    
+    async def _collect_for_symbols(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        collect: Callable[[str, str], Optional[int]],
+        label: str,
+        max_concurrency: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """
+        Run a blocking per-symbol collection for all symbols concurrently.
         
-        # Collect exchange netflow every hour
-        self.scheduler.add_job(
-            self._collect_exchange_netflow,
-            trigger=CronTrigger(minute=0),
-            id="exchange_netflow_collection",
-            name="Collect exchange netflow",
-            replace_existing=True
-        )
+        Each call runs in a worker thread (asyncio.to_thread), so the external
+        API round trips overlap instead of adding up. Sessions aren't thread
+        safe, so collect must use its own DB session.
+        
+        Args:
+            pairs: (symbol, interval) or (symbol, network) pairs to collect
+            collect: Blocking function collecting one pair; returns the
+                stored count, or None if it has none to report
+            label: Collection name for log messages
+            max_concurrency: Maximum calls in flight (unbounded if None)
+        
+        Returns:
+            Tuple of (success_count, error_count)
+        """
+        if max_concurrency is None:
+            run = partial(asyncio.to_thread, collect)
+        else:
+            semaphore = asyncio.Semaphore(max_concurrency)
+            
+            async def run(symbol: str, qualifier: str) -> Optional[int]:
+                async with semaphore:
+                    return await asyncio.to_thread(collect, symbol, qualifier)
         
-        # Collect active addresses every hour
-        self.scheduler.add_job(
-            self._collect_active_addresses,
-            trigger=CronTrigger(minute=30),
-            id="active_addresses_collection",
-            name="Collect active addresses",
-            replace_existing=True
+        results = await asyncio.gather(
+            *(run(symbol, qualifier) for symbol, qualifier in pairs),
+            return_exceptions=True
         )
         
-        logger.info("On-chain collection jobs scheduled")
-    
-    async def _collect_klines_1m(self):
-        """Collect 1-minute K-lines for all symbols."""
-        await self._collect_klines_for_interval("1m", limit=10)
-    
-    async def _collect_klines_5m(self):
-        """Collect 5-minute K-lines for all symbols."""
-        await self._collect_klines_for_interval("5m", limit=10)
-    
-    async def _collect_klines_1h(self):
-        """Collect hourly K-lines for all symbols."""
-        await self._collect_klines_for_interval("1h", limit=24)
-    
-    async def _collect_klines_1d(self):
-        """Collect daily K-lines for all symbols."""
-        await self._collect_klines_for_interval("1d", limit=30)
+        success_count = 0
+        error_count = 0
+        
+        for (symbol, qualifier), result in zip(pairs, results):
+            if isinstance(result, BaseException):
+                error_count += 1
+                logger.error(
+                    f"Error collecting {label} for {symbol}/{qualifier}",
+                    error=str(result)
+                )
+            else:
+                success_count += 1
+                logger.info(
+                    f"Collected {label} for {symbol}/{qualifier}",
+                    stored_count=result
+                )
+        
+        return success_count, error_count
     
     async def _collect_klines_for_interval(self, interval: str, limit: int):
         """
@@ -173,50 +227,88 @@ class DataCollectorScheduler:
         """
         logger.info(f"Starting K-line collection for interval: {interval}")
         
-        db = next(get_db())
-        service = KLineService(db, self.binance_adapter)
+        def collect(symbol: str, interval: str) -> int:
+            with _db_session() as db:
+                return KLineService(db, self.binance_adapter).collect_klines(
+                    symbol=symbol,
+                    interval=interval,
+                    limit=limit,
+                    invalidate_cache=False
+                )
         
-        success_count = 0
-        error_count = 0
+        pairs = [(symbol, interval) for symbol in self.KLINE_SYMBOLS]
+        success_count, error_count = await self._collect_for_symbols(pairs, collect, "K-lines")
+        
+        # One pipelined invalidation for the whole round
+        try:
+            await asyncio.to_thread(invalidate_kline_caches, pairs)
+        except Exception as e:
+            logger.error(
+                f"Failed to invalidate K-line caches for interval: {interval}",
+                error=str(e)
+            )
+        
+        # One increment per status for the whole run
+        if success_count:
+            record_kline_collection(ALL_LABEL, interval, "success", success_count)
+        if error_count:
+            record_kline_collection(ALL_LABEL, interval, "error", error_count)
         
-        for symbol in self.kline_symbols:
-            try:
-                result = service.collect_klines(
+        logger.info(
+            f"K-line collection completed for interval: {interval}",
+            success_count=success_count,
+            error_count=error_count
+        )
+    
+    async def backfill_historical_klines(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        start_time: datetime,
+        end_time: Optional[datetime] = None
+    ) -> Tuple[int, int]:
+        """
+        Backfill historical K-lines for many (symbol, interval) pairs concurrently.
+        
+        At most HISTORICAL_BACKFILL_CONCURRENCY pairs run at once, which keeps
+        the fan-out within the DB connection pool and Binance's request weight.
+        
+        Args:
+            pairs: (symbol, interval) pairs to backfill
+            start_time: Start time for data collection
+            end_time: End time for data collection
+        
+        Returns:
+            Tuple of (success_count, error_count)
+        """
+        logger.info(f"Starting historical K-line backfill for {len(pairs)} pairs")
+        
+        def collect(symbol: str, interval: str) -> int:
+            with _db_session() as db:
+                return KLineService(db, self.binance_adapter).collect_historical_klines(
                     symbol=symbol,
                     interval=interval,
-                    limit=limit
-                )
-                success_count += 1
-                logger.info(
-                    f"Collected K-lines for {symbol}/{interval}",
-                    stored_count=result["stored_count"]
-                )
-            except Exception as e:
-                error_count += 1
-                logger.error(
-                    f"Error collecting K-lines for {symbol}/{interval}",
-                    error=str(e)
+                    start_time=start_time,
+                    end_time=end_time
                 )
         
+        success_count, error_count = await self._collect_for_symbols(
+            pairs, collect, "historical K-lines", max_concurrency=self.HISTORICAL_BACKFILL_CONCURRENCY
+        )
+        
         logger.info(
-            f"K-line collection completed for interval: {interval}",
+            "Historical K-line backfill completed",
             success_count=success_count,
             error_count=error_count
         )
+        return success_count, error_count
     
     async def _collect_large_transfers(self):
         """Collect large transfers for all symbols."""
         logger.info("Starting large transfers collection")
         
-        db = next(get_db())
-        service = OnChainService(db, self.bitquery_adapter)
-        
-        success_count = 0
-        error_count = 0
-        
-        for symbol in self.onchain_symbols:
-            try:
-                network = self.onchain_networks[symbol]
+        def collect(symbol: str, network: str) -> int:
+            with _db_session() as db:
+                service = OnChainService(db, self.bitquery_adapter)
                 result = service.collect_large_transfers(
                     symbol=symbol,
                     network=network,
@@ -224,17 +316,12 @@ class DataCollectorScheduler:
                     hours=1,
                     limit=50
                 )
-                success_count += 1
-                logger.info(
-                    f"Collected large transfers for {symbol}",
-                    stored_count=result["stored_count"]
-                )
-            except Exception as e:
-                error_count += 1
-                logger.error(
-                    f"Error collecting large transfers for {symbol}",
-                    error=str(e)
-                )
+                return result["stored_count"]
+        
+        success_count, error_count = await self._collect_for_symbols(
+            self.ONCHAIN_PAIRS, collect, "large transfers"
+        )
+        _record_onchain_run("large_transfers", success_count, error_count)
         
         logger.info(
             "Large transfers collection completed",
@@ -246,32 +333,21 @@ class DataCollectorScheduler:
         """Collect smart money activity for all symbols."""
         logger.info("Starting smart money collection")
         
-        db = next(get_db())
-        service = OnChainService(db, self.bitquery_adapter)
-        
-        success_count = 0
-        error_count = 0
-        
-        for symbol in self.onchain_symbols:
-            try:
-                network = self.onchain_networks[symbol]
+        def collect(symbol: str, network: str) -> int:
+            with _db_session() as db:
+                service = OnChainService(db, self.bitquery_adapter)
                 result = service.collect_smart_money_activity(
                     symbol=symbol,
                     network=network,
                     hours=1,
                     limit=50
                 )
-                success_count += 1
-                logger.info(
-                    f"Collected smart money activity for {symbol}",
-                    stored_count=result["stored_count"]
-                )
-            except Exception as e:
-                error_count += 1
-                logger.error(
-                    f"Error collecting smart money activity for {symbol}",
-                    error=str(e)
-                )
+                return result["stored_count"]
+        
+        success_count, error_count = await self._collect_for_symbols(
+            self.ONCHAIN_PAIRS, collect, "smart money activity"
+        )
+        _record_onchain_run("smart_money", success_count, error_count)
         
         logger.info(
             "Smart money collection completed",
@@ -283,43 +359,34 @@ class DataCollectorScheduler:
         """Collect exchange netflow for all symbols."""
         logger.info("Starting exchange netflow collection")
         
-        db = next(get_db())
-        service = OnChainService(db, self.bitquery_adapter)
-        
-        for symbol in self.onchain_symbols:
-            try:
-                network = self.onchain_networks[symbol]
-                result = service.collect_exchange_netflow(
+        def collect(symbol: str, network: str) -> None:
+            with _db_session() as db:
+                service = OnChainService(db, self.bitquery_adapter)
+                service.collect_exchange_netflow(
                     symbol=symbol,
                     network=network,
                     hours=1
                 )
-                logger.info(f"Collected exchange netflow for {symbol}")
-            except Exception as e:
-                logger.error(
-                    f"Error collecting exchange netflow for {symbol}",
-                    error=str(e)
-                )
+        
+        success_count, error_count = await self._collect_for_symbols(
+            self.ONCHAIN_PAIRS, collect, "exchange netflow"
+        )
+        _record_onchain_run("exchange_netflow", success_count, error_count)
     
     async def _collect_active_addresses(self):
         """Collect active addresses for all symbols."""
         logger.info("Starting active addresses collection")
         
-        db = next(get_db())
-        service = OnChainService(db, self.bitquery_adapter)
-        
-        for symbol in self.onchain_symbols:
-            try:
-                network = self.onchain_networks[symbol]
-                result = service.collect_active_addresses(
+        def collect(symbol: str, network: str) -> None:
+            with _db_session() as db:
+                service = OnChainService(db, self.bitquery_adapter)
+                service.collect_active_addresses(
                     symbol=symbol,
                     network=network,
                     hours=1
                 )
-                logger.info(f"Collected active addresses for {symbol}")
-            except Exception as e:
-                logger.error(
-                    f"Error collecting active addresses for {symbol}",
-                    error=str(e)
-                )
-
+        
+        success_count, error_count = await self._collect_for_symbols(
+            self.ONCHAIN_PAIRS, collect, "active addresses"
+        )
+        _record_onchain_run("active_addresses", success_count, error_count)
@@ -4,11 +4,18 @@ K-Line Data Collection Service
 Handles fetching, storing, and querying K-line data.
 """
 
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
 import asyncio
+import hashlib
+import logging
+from typing import List, NamedTuple, Optional, Dict, Any, Sequence, Set, Tuple, Union
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+import orjson
+from cachetools import TTLCache
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import String, and_, case, column, desc, func, insert, select, true, tuple_, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from services.datahub.app.models.kline import KLine
 from services.datahub.app.adapters.binance_adapter import BinanceAdapter
@@ -17,30 +24,216 @@ from shared.utils.redis_client import get_redis_client
 
 logger = setup_logging("kline_service")
 
+# Level checks let filtered levels skip formatting the per-request key mapping
+# log; checked per call (isEnabledFor is cached by logging), so level changes
+# made after import apply
+_stdlib_logger = logging.getLogger("kline_service")
+
+# TTL (seconds) for cached K-lines (latest and range queries), roughly a quarter of the candle period
+LATEST_KLINE_CACHE_TTL = {"1m": 15, "5m": 60, "15m": 225, "1h": 600, "4h": 1800, "1d": 14400}
+DEFAULT_LATEST_KLINE_CACHE_TTL = 60
+
+# Rows per bulk insert when backfilling historical K-lines
+HISTORICAL_BATCH_SIZE = 10000
+
+# Inserted rows per commit when backfilling (amortizes WAL flushes across batches)
+HISTORICAL_COMMIT_ROWS = 50000
+
+# In-process cache of range query results in front of Redis, keyed by
+# (symbol, interval, start_ms, end_ms, limit). Bypasses the cache generation,
+# so results may lag collection by up to the TTL.
+LOCAL_KLINE_CACHE_TTL = 5
+_LOCAL_KLINE_CACHE: TTLCache = TTLCache(maxsize=10000, ttl=LOCAL_KLINE_CACHE_TTL)
+
+# Unique key of the klines table (see migration 20251118_0900)
+KLINE_KEY_COLUMNS = ("symbol", "interval", "open_time")
+
+
+class CachedKLine(NamedTuple):
+    """
+    Lightweight K-line row served from the Redis cache.
+
+    Carries the KLineData fields; see _encode_cached_klines() for the
+    cached layout.
+    """
+    symbol: str
+    interval: str
+    open_time: int
+    close_time: int
+    open_price: float
+    high_price: float
+    low_price: float
+    close_price: float
+    volume: float
+    quote_volume: Optional[float]
+    trade_count: Optional[int]
+    taker_buy_base_volume: Optional[float]
+    taker_buy_quote_volume: Optional[float]
+    source: str
+
+
+def _range_cache_key(canonical: str) -> str:
+    """
+    Build the Redis key of a get_klines range query.
+
+    The canonical "symbol|interval|generation|format|start|end|limit" string is
+    hashed to a fixed 16-hex-digit BLAKE2b digest ("kr:<digest>"), keeping every
+    key 19 bytes regardless of the parameters. The mapping is logged at DEBUG.
+    """
+    cache_key = f"kr:{hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()}"
+    if _stdlib_logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"K-line range cache key {cache_key} <- {canonical}")
+    return cache_key
+
+
+def _to_epoch_ms(value: Union[datetime, int]) -> int:
+    """
+    Convert a datetime to Unix milliseconds, treating naive values as UTC.
+
+    Keeps the SQL filter and cache key identical for naive and UTC-aware
+    datetimes of the same instant, independent of the server's local timezone.
+    Integers are taken as epoch milliseconds and returned unchanged.
+    """
+    if isinstance(value, int):
+        return value
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+# Per-row fields stored as cached columns (symbol and interval are part of the cache key)
+CACHED_KLINE_COLUMNS = CachedKLine._fields[2:]
+
+# Cached payload layout version, part of the range cache key so entries written
+# in an older layout are never decoded with the current one
+KLINE_CACHE_FORMAT = "c2"
+
+# Timestamp columns stored delta-of-delta encoded (regular candles encode to runs of 0)
+DELTA_ENCODED_COLUMNS = frozenset({"open_time", "close_time"})
+
+
+def _delta_of_delta(values: List[int]) -> List[int]:
+    """
+    Encode integers as [first, first delta, delta-of-delta, ...].
+
+    Evenly spaced timestamps (every candle in a range) become a run of zeros
+    after the first two values, which serializes to one byte per row.
+    """
+    encoded = values[:2]
+    if len(values) > 1:
+        encoded[1] = values[1] - values[0]
+    for i in range(2, len(values)):
+        encoded.append(values[i] - 2 * values[i - 1] + values[i - 2])
+    return encoded
+
+
+def _undo_delta_of_delta(encoded: List[int]) -> List[int]:
+    """Decode a list produced by _delta_of_delta()."""
+    values = encoded[:1]
+    delta = 0
+    for i in range(1, len(encoded)):
+        delta = encoded[i] if i == 1 else delta + encoded[i]
+        values.append(values[-1] + delta)
+    return values
+
+
+def _encode_cached_klines(klines: List[Any]) -> bytes:
+    """
+    Serialize K-lines for the range cache in columnar layout.
+
+    The payload is a JSON array with one array per CACHED_KLINE_COLUMNS field
+    (index-aligned, same order as the rows). Compared with one array per row
+    this drops the repeated symbol/interval values and keeps each column
+    contiguous for consumers that transpose to arrays. DELTA_ENCODED_COLUMNS
+    are stored delta-of-delta encoded, shrinking 13-digit millisecond
+    timestamps to mostly single-digit zeros.
+
+    Args:
+        klines: K-line rows (ORM objects or CachedKLine)
+
+    Returns:
+        orjson-encoded payload
+    """
+    columns = []
+    for field in CACHED_KLINE_COLUMNS:
+        column_values = [getattr(kline, field) for kline in klines]
+        if field in DELTA_ENCODED_COLUMNS:
+            column_values = _delta_of_delta(column_values)
+        columns.append(column_values)
+    return orjson.dumps(columns)
+
+
+def _decode_cached_klines(symbol: str, interval: str, payload: Union[str, bytes]) -> List[CachedKLine]:
+    """
+    Rebuild CachedKLine rows from a payload written by _encode_cached_klines().
+
+    Args:
+        symbol: Trading pair symbol of the cache key
+        interval: K-line interval of the cache key
+        payload: Cached value
+
+    Returns:
+        K-line rows in cached order
+    """
+    columns = [
+        _undo_delta_of_delta(column_values) if field in DELTA_ENCODED_COLUMNS else column_values
+        for field, column_values in zip(CACHED_KLINE_COLUMNS, orjson.loads(payload))
+    ]
+    return [CachedKLine(symbol, interval, *row) for row in zip(*columns)]
+
+
+def invalidate_kline_caches(
+    pairs: Sequence[Tuple[str, str]],
+    redis_client: Optional[Any] = None
+) -> None:
+    """
+    Invalidate the cached K-lines of many (symbol, interval) pairs in one round-trip.
+
+    Unlinks each pair's cache generation key (orphaning every cached range
+    query, see KLineService.get_klines) and its latest K-line key through a
+    single non-transactional pipeline. UNLINK frees memory in the background
+    instead of blocking Redis like DEL.
+
+    Args:
+        pairs: (symbol, interval) pairs
+        redis_client: Redis client (a pooled client is used if omitted)
+    """
+    if not pairs:
+        return
+    pipe = (redis_client or get_redis_client()).pipeline(transaction=False)
+    for symbol, interval in pairs:
+        pipe.unlink(f"klines:{symbol}:{interval}", f"klines:latest:{symbol}:{interval}")
+    pipe.execute()
+
 
 class KLineService:
     """
     Service for managing K-line data collection and storage.
+
+    Collection methods run on a synchronous Session; query methods are
+    coroutines and expect an AsyncSession.
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Union[Session, AsyncSession], binance_adapter: Optional[BinanceAdapter] = None):
         """
         Initialize K-line service.
         
         Args:
-            db: Database session
+            db: Database session (AsyncSession for the query methods)
+            binance_adapter: Shared Binance adapter (a new one is created if omitted)
         """
         self.db = db
-        self.binance_adapter = BinanceAdapter()
+        self.binance_adapter = binance_adapter or BinanceAdapter()
         self.redis_client = get_redis_client()
     
     def collect_klines(
         self,
         symbol: str,
         interval: str,
-        start_time: Optional[datetime] = None,
-        end_time: Optional[datetime] = None,
-        limit: int = 500
+        start_time: Optional[Union[datetime, int]] = None,
+        end_time: Optional[Union[datetime, int]] = None,
+        limit: int = 500,
+        invalidate_cache: bool = True
     ) -> int:
         """
         Collect K-line data from Binance and store in database.
@@ -48,9 +241,12 @@ class KLineService:
         Args:
             symbol: Trading pair symbol (e.g., "BTCUSDT")
             interval: K-line interval (e.g., "1m", "1h", "1d")
-            start_time: Start time for data collection
-            end_time: End time for data collection
+            start_time: Start time for data collection (datetime or epoch ms)
+            end_time: End time for data collection (datetime or epoch ms)
             limit: Maximum number of K-lines to fetch
+            invalidate_cache: Invalidate the pair's cached K-lines after storing;
+                multi-symbol callers pass False and call invalidate_kline_caches()
+                once for the whole round
         
         Returns:
             Number of K-lines stored
@@ -67,35 +263,17 @@ class KLineService:
                 limit=limit
             )
             
-            # Store K-lines in database
-            stored_count = 0
-            for kline_data in klines_data:
-                # Check if K-line already exists
-                existing = self.db.query(KLine).filter(
-                    and_(
-                        KLine.symbol == kline_data["symbol"],
-                        KLine.interval == kline_data["interval"],
-                        KLine.open_time == kline_data["open_time"]
-                    )
-                ).first()
-                
-                if existing:
-                    # Update existing K-line
-                    for key, value in kline_data.items():
-                        setattr(existing, key, value)
-                else:
-                    # Create new K-line
-                    kline = KLine(**kline_data)
-                    self.db.add(kline)
-                
-                stored_count += 1
-            
-            self.db.commit()
+            # Store K-lines in database: one INSERT ... ON CONFLICT DO UPDATE
+            # (existing K-lines are updated in place)
+            if klines_data:
+                self.db.execute(self._upsert_statement(klines_data))
+                self.db.commit()
+            stored_count = len(klines_data)
             logger.info(f"Successfully stored {stored_count} K-lines for {symbol}")
             
             # Invalidate cache
-            cache_key = f"klines:{symbol}:{interval}"
-            self.redis_client.delete(cache_key)
+            if invalidate_cache:
+                invalidate_kline_caches([(symbol, interval)], self.redis_client)
             
             return stored_count
             
@@ -134,36 +312,29 @@ class KLineService:
                 end_time=end_time
             )
             
-            # Store K-lines in database (batch insert for efficiency)
+            # Store K-lines in database (bulk insert of new rows, no ORM objects)
+            # Commits every HISTORICAL_COMMIT_ROWS rows; a failure rolls back the
+            # uncommitted batches, which a rerun re-inserts (existing rows are skipped)
             stored_count = 0
-            batch_size = 1000
+            uncommitted_rows = 0
             
-            for i in range(0, len(klines_data), batch_size):
-                batch = klines_data[i:i + batch_size]
-                
-                for kline_data in batch:
-                    # Check if K-line already exists
-                    existing = self.db.query(KLine).filter(
-                        and_(
-                            KLine.symbol == kline_data["symbol"],
-                            KLine.interval == kline_data["interval"],
-                            KLine.open_time == kline_data["open_time"]
-                        )
-                    ).first()
-                    
-                    if not existing:
-                        kline = KLine(**kline_data)
-                        self.db.add(kline)
-                        stored_count += 1
+            for i in range(0, len(klines_data), HISTORICAL_BATCH_SIZE):
+                inserted = self._insert_new_klines(
+                    symbol, interval, klines_data[i:i + HISTORICAL_BATCH_SIZE]
+                )
+                stored_count += inserted
+                uncommitted_rows += inserted
                 
-                self.db.commit()
-                logger.info(f"Stored batch {i // batch_size + 1}, total: {stored_count}")
+                if uncommitted_rows >= HISTORICAL_COMMIT_ROWS:
+                    self.db.commit()
+                    uncommitted_rows = 0
+                logger.info(f"Stored batch {i // HISTORICAL_BATCH_SIZE + 1}, total: {stored_count}")
             
+            self.db.commit()
             logger.info(f"Successfully stored {stored_count} historical K-lines for {symbol}")
             
             # Invalidate cache
-            cache_key = f"klines:{symbol}:{interval}"
-            self.redis_client.delete(cache_key)
+            invalidate_kline_caches([(symbol, interval)], self.redis_client)
             
             return stored_count
             
@@ -172,54 +343,192 @@ class KLineService:
             logger.error(f"Error collecting historical K-lines: {e}")
             raise
     
-    def get_klines(
+    @staticmethod
+    def _upsert_statement(klines_data: List[Dict[str, Any]]):
+        """
+        Build a PostgreSQL bulk upsert for K-line rows.
+        
+        Conflicts on the unique (symbol, interval, open_time) key update every
+        other supplied column and bump updated_at.
+        
+        Args:
+            klines_data: K-line rows as column dicts
+        
+        Returns:
+            INSERT ... ON CONFLICT DO UPDATE statement
+        """
+        stmt = pg_insert(KLine).values(klines_data)
+        update_columns = {
+            key: stmt.excluded[key]
+            for key in klines_data[0]
+            if key not in KLINE_KEY_COLUMNS
+        }
+        update_columns["updated_at"] = func.now()
+        return stmt.on_conflict_do_update(
+            index_elements=list(KLINE_KEY_COLUMNS),
+            set_=update_columns
+        )
+    
+    def _insert_new_klines(self, symbol: str, interval: str, batch: List[Dict[str, Any]]) -> int:
+        """
+        Insert the K-lines of a batch that aren't stored yet (no commit).
+        
+        On PostgreSQL the batch goes through psycopg2's execute_values as one
+        multi-row INSERT ... ON CONFLICT DO NOTHING on the unique K-line key,
+        skipping SQLAlchemy statement compilation and the existence query.
+        created_at/updated_at are set to now() in the row template.
+        Other backends look up the stored open times and executemany the rest.
+        
+        Args:
+            symbol: Trading pair symbol
+            interval: K-line interval
+            batch: K-line rows as column dicts (at most HISTORICAL_BATCH_SIZE)
+        
+        Returns:
+            Number of K-lines inserted
+        """
+        if not batch:
+            return 0
+        
+        if self.db.get_bind().dialect.name == "postgresql":
+            # psycopg2 is only needed (and only importable) on PostgreSQL
+            from psycopg2 import sql
+            from psycopg2.extras import execute_values
+            
+            columns = list(batch[0])
+            query = sql.SQL("INSERT INTO {} ({}) VALUES %s ON CONFLICT ({}) DO NOTHING").format(
+                sql.Identifier(KLine.__tablename__),
+                sql.SQL(", ").join(map(sql.Identifier, columns + ["created_at", "updated_at"])),
+                sql.SQL(", ").join(map(sql.Identifier, KLINE_KEY_COLUMNS))
+            )
+            template = "(" + ", ".join(["%s"] * len(columns) + ["now()", "now()"]) + ")"
+            cursor = self.db.connection().connection.cursor()
+            try:
+                # page_size covers the whole batch, so rowcount counts every inserted row
+                execute_values(
+                    cursor,
+                    query,
+                    [tuple(row[name] for name in columns) for row in batch],
+                    template=template,
+                    page_size=len(batch)
+                )
+                return cursor.rowcount
+            finally:
+                cursor.close()
+        
+        # One query per batch for the open_times already stored
+        existing_times = self._existing_open_times(
+            symbol, interval, [kline_data["open_time"] for kline_data in batch]
+        )
+        new_rows = [
+            kline_data for kline_data in batch
+            if kline_data["open_time"] not in existing_times
+        ]
+        if new_rows:
+            # executemany-style INSERT (batched by insertmanyvalues)
+            self.db.execute(insert(KLine), new_rows)
+        return len(new_rows)
+    
+    def _existing_open_times(self, symbol: str, interval: str, open_times: List[int]) -> Set[int]:
+        """
+        Return which of the given open times are already stored (single query).
+        
+        Args:
+            symbol: Trading pair symbol
+            interval: K-line interval
+            open_times: Candidate open times (ms)
+        
+        Returns:
+            Set of stored open times
+        """
+        if not open_times:
+            return set()
+        
+        rows = self.db.query(KLine.open_time).filter(
+            KLine.symbol == symbol,
+            KLine.interval == interval,
+            KLine.open_time.in_(open_times)
+        )
+        return {open_time for (open_time,) in rows}
+    
+    async def get_klines(
         self,
         symbol: str,
         interval: str,
-        start_time: Optional[datetime] = None,
-        end_time: Optional[datetime] = None,
+        start_time: Optional[Union[datetime, int]] = None,
+        end_time: Optional[Union[datetime, int]] = None,
         limit: int = 500,
         use_cache: bool = True
-    ) -> List[KLine]:
+    ) -> List[Union[KLine, CachedKLine]]:
         """
         Get K-lines from database.
         
+        Cached entries are keyed by the query parameters and the current
+        cache generation of (symbol, interval); collection deletes the
+        generation key, which orphans every cached range at once. Results
+        are also kept in-process for LOCAL_KLINE_CACHE_TTL seconds, which
+        skips Redis entirely for repeated polling queries.
+        
         Args:
             symbol: Trading pair symbol
             interval: K-line interval
-            start_time: Start time filter
-            end_time: End time filter
+            start_time: Start time filter (datetime, or epoch ms to skip conversion)
+            end_time: End time filter (datetime, or epoch ms to skip conversion)
             limit: Maximum number of K-lines to return
-            use_cache: Whether to use Redis cache
+            use_cache: Whether to use the in-process and Redis caches
         
         Returns:
-            List of K-line objects
+            List of K-line objects (CachedKLine rows on a cache hit)
         """
         try:
-            # Try cache first
+            # Converted once; used for both the SQL filter and the cache key
+            start_ms = None if start_time is None else _to_epoch_ms(start_time)
+            end_ms = None if end_time is None else _to_epoch_ms(end_time)
+            
+            # Try cache first (in-process, then Redis)
             if use_cache:
-                cache_key = f"klines:{symbol}:{interval}:{start_time}:{end_time}:{limit}"
-                cached = self.redis_client.get(cache_key)
+                local_key = (symbol, interval, start_ms, end_ms, limit)
+                local = _LOCAL_KLINE_CACHE.get(local_key)
+                if local is not None:
+                    return list(local)
+                
+                # Redis calls run in a worker thread so they don't block the event loop
+                cache_key, cached = await asyncio.to_thread(
+                    self._read_range_cache, symbol, interval, start_ms, end_ms, limit
+                )
                 if cached:
                     logger.info(f"Cache hit for K-lines: {cache_key}")
-                    # Note: In production, deserialize cached data properly
-                    # For now, we'll skip cache and query database
+                    rows = _decode_cached_klines(symbol, interval, cached)
+                    _LOCAL_KLINE_CACHE[local_key] = tuple(rows)
+                    return rows
             
             # Query database
-            query = self.db.query(KLine).filter(
-                and_(
-                    KLine.symbol == symbol,
-                    KLine.interval == interval
-                )
+            stmt = select(KLine).where(
+                KLine.symbol == symbol,
+                KLine.interval == interval
             )
             
-            if start_time:
-                query = query.filter(KLine.open_time >= int(start_time.timestamp() * 1000))
+            if start_ms is not None:
+                stmt = stmt.where(KLine.open_time >= start_ms)
             
-            if end_time:
-                query = query.filter(KLine.open_time <= int(end_time.timestamp() * 1000))
+            if end_ms is not None:
+                stmt = stmt.where(KLine.open_time <= end_ms)
             
-            klines = query.order_by(desc(KLine.open_time)).limit(limit).all()
+            result = await self.db.scalars(stmt.order_by(desc(KLine.open_time)).limit(limit))
+            klines = result.all()
+            
+            if use_cache:
+                await asyncio.to_thread(
+                    self.redis_client.setex,
+                    cache_key,
+                    LATEST_KLINE_CACHE_TTL.get(interval, DEFAULT_LATEST_KLINE_CACHE_TTL),
+                    _encode_cached_klines(klines)
+                )
+                # Session-independent rows for the in-process cache
+                _LOCAL_KLINE_CACHE[local_key] = tuple(
+                    CachedKLine(*(getattr(kline, field) for field in CachedKLine._fields))
+                    for kline in klines
+                )
             
             logger.info(f"Retrieved {len(klines)} K-lines for {symbol}")
             return klines
@@ -228,24 +537,84 @@ class KLineService:
             logger.error(f"Error retrieving K-lines: {e}")
             raise
     
-    def get_latest_kline(self, symbol: str, interval: str) -> Optional[KLine]:
+    def _read_range_cache(
+        self,
+        symbol: str,
+        interval: str,
+        start_ms: Optional[int],
+        end_ms: Optional[int],
+        limit: int
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Resolve the Redis key of a range query and read it (blocking; run via asyncio.to_thread).
+        
+        Returns:
+            Tuple of (cache key, cached payload or None)
+        """
+        generation = self._cache_generation(symbol, interval)
+        cache_key = _range_cache_key(
+            f"{symbol}|{interval}|{generation}|{KLINE_CACHE_FORMAT}|{start_ms}|{end_ms}|{limit}"
+        )
+        return cache_key, self.redis_client.get(cache_key)
+    
+    def _cache_generation(self, symbol: str, interval: str) -> str:
+        """
+        Return the cache generation token for (symbol, interval), creating it if missing.
+        
+        The token lives at "klines:{symbol}:{interval}", the key the collect
+        methods already delete on every write.
+        """
+        generation_key = f"klines:{symbol}:{interval}"
+        generation = self.redis_client.get(generation_key)
+        if generation is None:
+            generation = uuid4().hex[:12]
+            if not self.redis_client.set(generation_key, generation, nx=True):
+                # Another request created it first
+                generation = self.redis_client.get(generation_key) or generation
+        return generation
+    
+    async def get_latest_kline(
+        self,
+        symbol: str,
+        interval: str,
+        use_cache: bool = True
+    ) -> Optional[Union[KLine, CachedKLine]]:
         """
         Get the latest K-line for a symbol and interval.
 
+        Cached in Redis at "klines:latest:{symbol}:{interval}" for roughly a
+        quarter of the candle period; collection unlinks the key.
+
         Args:
             symbol: Trading pair symbol
             interval: K-line interval
+            use_cache: Whether to use the Redis cache
 
         Returns:
-            Latest K-line object or None
+            Latest K-line object (CachedKLine on a cache hit) or None
         """
+        cache_key = f"klines:latest:{symbol}:{interval}"
         try:
-            kline = self.db.query(KLine).filter(
-                and_(
-                    KLine.symbol == symbol,
-                    KLine.interval == interval
+            if use_cache:
+                cached = await asyncio.to_thread(self.redis_client.get, cache_key)
+                if cached:
+                    return CachedKLine(**orjson.loads(cached))
+
+            result = await self.db.scalars(
+                select(KLine)
+                .where(KLine.symbol == symbol, KLine.interval == interval)
+                .order_by(desc(KLine.open_time))
+                .limit(1)
+            )
+            kline = result.first()
+
+            if use_cache and kline is not None:
+                await asyncio.to_thread(
+                    self.redis_client.setex,
+                    cache_key,
+                    LATEST_KLINE_CACHE_TTL.get(interval, DEFAULT_LATEST_KLINE_CACHE_TTL),
+                    orjson.dumps({field: getattr(kline, field) for field in CachedKLine._fields})
                 )
-            ).order_by(desc(KLine.open_time)).first()
 
             return kline
 
@@ -253,73 +622,140 @@ class KLineService:
             logger.error(f"Error retrieving latest K-line: {e}")
             raise
 
-    async def get_klines_batch(self, queries: List[Any]) -> Dict[str, Any]:
+    async def get_latest_klines(
+        self,
+        pairs: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], KLine]:
+        """
+        Get the latest K-line for many (symbol, interval) pairs in one round-trip.
+
+        Equivalent SQL:
+            SELECT k.* FROM (VALUES (:s1, :i1), ...) AS v(symbol, interval)
+            JOIN LATERAL (
+                SELECT * FROM klines
+                WHERE symbol = v.symbol AND interval = v.interval
+                ORDER BY open_time DESC LIMIT 1
+            ) k ON TRUE
+
+        Args:
+            pairs: (symbol, interval) pairs
+
+        Returns:
+            {(symbol, interval): latest K-line}; pairs without data are omitted
+        """
+        unique_pairs = list(dict.fromkeys(pairs))
+        if not unique_pairs:
+            return {}
+
+        wanted = values(
+            column("symbol", String), column("interval", String), name="v"
+        ).data(unique_pairs)
+        latest = (
+            select(KLine)
+            .where(KLine.symbol == wanted.c.symbol, KLine.interval == wanted.c.interval)
+            .order_by(desc(KLine.open_time))
+            .limit(1)
+            .lateral("k")
+        )
+        stmt = select(aliased(KLine, latest)).select_from(wanted).join(latest, true())
+
+        try:
+            result = await self.db.scalars(stmt)
+        except Exception as e:
+            logger.error(f"Error retrieving latest K-lines for {len(unique_pairs)} pairs: {e}")
+            raise
+
+        return {(kline.symbol, kline.interval): kline for kline in result.all()}
+
+    async def get_klines_batch(self, queries: List[Any], columnar: bool = False) -> Dict[str, Any]:
         """
-        批量获取K线数据（并发查询）
+        批量获取K线数据（单条SQL查询）
 
         设计目的：
         - 为v2.7模型提供高效的批量数据获取能力
-        - 使用asyncio.gather()并发查询数据库，提升性能
-        - 单个查询失败不影响其他查询（降级策略）
+        - 所有 (symbol, interval) 组合合并为一条窗口函数查询，只占用一个连接、一次网络往返
+        - 重复的 (symbol, interval, limit) 查询只计算一次
 
         Args:
             queries: K线查询列表，每个查询包含 symbol, interval, limit
+            columnar: 是否按列返回（每个组合一个ColumnarKLines，便于客户端直接转为numpy数组）
 
         Returns:
             批量查询结果字典，包含：
             - success: 是否所有查询都成功
             - results: 成功的查询结果 {"{symbol}:{interval}": [KLineData, ...]}
+              （columnar=True 时为 {"{symbol}:{interval}": ColumnarKLines}）
             - errors: 失败的查询错误信息 {"{symbol}:{interval}": "error message"}
-            - metadata: 查询元数据（总数、成功数、失败数、K线总数）
+            - metadata: 查询元数据（总数、实际查询数、成功数、失败数、K线总数）
 
         性能优势：
-        - 并发查询：7个查询并发执行，总延迟 ≈ 单次查询延迟（~100ms）
-        - 相比串行调用7次（~700ms），性能提升7倍
+        - 7个查询合并为1条SQL，总延迟 ≈ 单次查询延迟（~100ms）
+        - 相比并发执行7条查询，不再占用7个数据库连接
         """
-        from services.datahub.app.api.klines import KLineData, BatchKLinesResponse, BatchKLinesMetadata
+        from services.datahub.app.api.klines import (
+            KLineData, ColumnarKLines, BatchKLinesResponse, BatchKLinesMetadata
+        )
 
-        # 创建并发任务列表
-        tasks = []
-        query_keys = []  # 用于记录每个任务对应的key
+        # 对重复的 (symbol, interval, limit) 查询去重
+        unique = {}   # (symbol, interval, limit) -> 查询对象
+        mapping = []  # 按请求顺序记录每个查询对应的去重key
 
         for query in queries:
-            key = f"{query.symbol}:{query.interval}"
-            query_keys.append(key)
-
-            # 创建异步任务（使用run_in_executor在线程池中执行同步数据库查询）
-            task = asyncio.get_event_loop().run_in_executor(
-                None,  # 使用默认线程池
-                self._get_klines_sync,  # 同步查询方法
-                query.symbol,
-                query.interval,
-                query.limit
-            )
-            tasks.append(task)
+            dedup_key = (query.symbol, query.interval, query.limit)
+            if dedup_key not in unique:
+                unique[dedup_key] = query
+            mapping.append(dedup_key)
 
-        # 并发执行所有查询（return_exceptions=True 确保单个失败不影响其他查询）
-        results_list = await asyncio.gather(*tasks, return_exceptions=True)
+        # 单条SQL取回所有 (symbol, interval) 组合的K线，按组合分组
+        # 查询失败时所有组合都记为失败（降级策略由调用方根据errors字段处理）
+        grouped = {}
+        batch_error = None
+        if unique:
+            try:
+                # 同一 (symbol, interval) 有多个limit时取最大值，结果再按各自limit截断
+                pair_limits = {}
+                for symbol, interval, limit in unique:
+                    pair = (symbol, interval)
+                    pair_limits[pair] = max(limit, pair_limits.get(pair, 0))
+                grouped = await self._get_klines_grouped(pair_limits)
+            except Exception as e:
+                batch_error = e
 
-        # 处理查询结果
+        # 处理查询结果（按原始请求顺序展开去重后的结果）
         success_results = {}
         errors = {}
-        total_klines = 0
+        kline_counts = {}  # 每个key返回的K线数量
 
-        for key, result in zip(query_keys, results_list):
-            if isinstance(result, Exception):
+        for dedup_key in mapping:
+            symbol, interval, limit = dedup_key
+            key = f"{symbol}:{interval}"
+
+            # 同一key的前一个结果会被覆盖
+            success_results.pop(key, None)
+            kline_counts.pop(key, None)
+            errors.pop(key, None)
+
+            if batch_error is not None:
                 # 查询失败，记录错误
-                error_msg = str(result)
+                error_msg = str(batch_error)
                 errors[key] = error_msg
                 logger.warning(f"Batch query failed for {key}: {error_msg}")
             else:
-                # 查询成功，转换为KLineData格式
-                kline_data_list = [KLineData.from_orm(kline) for kline in result]
-                success_results[key] = kline_data_list
-                total_klines += len(kline_data_list)
-                logger.debug(f"Batch query succeeded for {key}: {len(kline_data_list)} klines")
+                # 查询成功，按各自的limit截断后转换为KLineData格式（或按列转置）
+                klines = grouped.get((symbol, interval), [])[:limit]
+                if columnar:
+                    success_results[key] = ColumnarKLines.from_rows(klines)
+                else:
+                    success_results[key] = [KLineData(**kline._asdict()) for kline in klines]
+                kline_counts[key] = len(klines)
+                logger.debug(f"Batch query succeeded for {key}: {len(klines)} klines")
+
+        total_klines = sum(kline_counts.values())
 
         # 构建响应
         metadata = BatchKLinesMetadata(
             total_queries=len(queries),
+            executed_queries=1 if unique else 0,
             successful_queries=len(success_results),
             failed_queries=len(errors),
             total_klines=total_klines
@@ -334,49 +770,76 @@ class KLineService:
 
         logger.info(
             f"Batch query completed: {metadata.successful_queries}/{metadata.total_queries} succeeded, "
-            f"{metadata.total_klines} total klines"
+            f"{metadata.total_klines} total klines, {metadata.executed_queries} database queries"
         )
 
         return response
 
-    def _get_klines_sync(
+    async def _get_klines_grouped(
         self,
-        symbol: str,
-        interval: str,
-        limit: int
-    ) -> List[KLine]:
+        pair_limits: Dict[Tuple[str, str], int]
+    ) -> Dict[Tuple[str, str], List[CachedKLine]]:
         """
-        同步获取K线数据（供批量查询使用）
+        用一条窗口函数查询获取多个 (symbol, interval) 组合的最新K线（供批量查询使用）
 
-        为什么需要这个方法：
-        - asyncio.gather()需要在线程池中执行同步数据库查询
-        - 每个查询使用独立的数据库会话，避免锁竞争
+        只查询KLineData需要的列（Core SELECT），结果直接构造为CachedKLine元组，
+        不创建ORM对象、不经过identity map。
+
+        等价SQL：
+            WITH ranked AS (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY symbol, interval ORDER BY open_time DESC
+                ) AS rn
+                FROM klines WHERE (symbol, interval) IN ((:s1, :i1), ...)
+            )
+            SELECT * FROM ranked
+            WHERE rn <= CASE WHEN symbol = :s1 AND interval = :i1 THEN :l1 ... END
+
+        每个组合的limit在SQL中过滤，limit差异较大时不会按最大limit多取行。
 
         Args:
-            symbol: 交易对符号
-            interval: K线时间周期
-            limit: K线数量限制
+            pair_limits: {(symbol, interval): 该组合的K线数量限制}
 
         Returns:
-            K线对象列表
+            {(symbol, interval): [CachedKLine, ...]}，每组按 open_time 降序排列
         """
-        from shared.utils.database import SessionLocal
+        rn = func.row_number().over(
+            partition_by=(KLine.symbol, KLine.interval),
+            order_by=KLine.open_time.desc()
+        ).label("rn")
 
-        # 为每个并发查询创建独立的数据库会话（避免并发冲突）
-        db = SessionLocal()
-        try:
-            # 直接查询数据库，不使用self.db（避免会话共享）
-            klines = (
-                db.query(KLine)
-                .filter(KLine.symbol == symbol, KLine.interval == interval)
-                .order_by(KLine.open_time.desc())
-                .limit(limit)
-                .all()
+        ranked = (
+            select(*[getattr(KLine, field) for field in CachedKLine._fields], rn)
+            .where(tuple_(KLine.symbol, KLine.interval).in_(list(pair_limits)))
+            .cte("ranked")
+        )
+
+        limits = set(pair_limits.values())
+        if len(limits) == 1:
+            rn_limit = limits.pop()
+        else:
+            rn_limit = case(
+                *[
+                    (and_(ranked.c.symbol == symbol, ranked.c.interval == interval), limit)
+                    for (symbol, interval), limit in pair_limits.items()
+                ],
+                else_=0
             )
-            return klines
+
+        stmt = (
+            select(*[ranked.c[field] for field in CachedKLine._fields])
+            .where(ranked.c.rn <= rn_limit)
+            .order_by(ranked.c.symbol, ranked.c.interval, ranked.c.rn)
+        )
+
+        try:
+            result = await self.db.execute(stmt)
         except Exception as e:
-            logger.error(f"Error in _get_klines_sync for {symbol}:{interval}: {e}")
+            logger.error(f"Error in _get_klines_grouped for {len(pair_limits)} pairs: {e}")
             raise
-        finally:
-            db.close()  # 确保会话关闭
 
+        grouped: Dict[Tuple[str, str], List[CachedKLine]] = {}
+        for row in result.tuples():
+            kline = CachedKLine(*row)
+            grouped.setdefault((kline.symbol, kline.interval), []).append(kline)
+        return grouped
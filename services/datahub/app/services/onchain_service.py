@@ -4,18 +4,217 @@ On-Chain Data Collection Service
 Business logic for collecting and managing on-chain metrics data.
 """
 
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, literal_column, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from shared.utils.logger import setup_logging
 from shared.utils.redis_client import get_redis_client, publish_event
 from services.datahub.app.models.onchain import OnChainMetrics
+from services.datahub.app.services.kline_service import _to_epoch_ms
 from services.datahub.app.adapters.chain_data_interface import ChainDataInterface
 
 logger = setup_logging("onchain_service")
 
+# TTL (seconds) for cached latest metrics; collectors poll on a minutes scale
+LATEST_METRICS_CACHE_TTL = 60
+
+# Response fields stored inside additional_metrics JSON: field -> (JSON key, type)
+ADDITIONAL_METRIC_FIELDS = {
+    "large_transfer_count": ("large_transfer_count", int),
+    "large_transfer_volume": ("large_transfer_volume", float),
+    "exchange_inflow": ("inflow", float),
+    "exchange_outflow": ("outflow", float),
+    "exchange_netflow": ("netflow", float),
+    "smart_money_inflow": ("smart_money_inflow", float),
+    "smart_money_outflow": ("smart_money_outflow", float),
+}
+
+
+# Conflict target of the per-transaction unique index (see migration 20251118_1800)
+TX_HASH_CONFLICT_ELEMENTS = (
+    "symbol",
+    "network",
+    text("(additional_metrics->>'transaction_hash')"),
+)
+TX_HASH_CONFLICT_WHERE = text("additional_metrics->>'transaction_hash' IS NOT NULL")
+
+# Metric type extraction, written with a literal key so it matches the
+# idx_onchain_type_latest expression index (see migration 20251119_1200)
+METRIC_TYPE_EXPR = literal_column("(onchain_metrics.additional_metrics->>'type')")
+
+# Rows per INSERT statement (~10 bound parameters per row, far below
+# PostgreSQL's 65535-parameter limit)
+UPSERT_CHUNK_SIZE = 500
+
+
+def _chunks(seq: List[Any], n: int) -> Iterator[List[Any]]:
+    """Yield successive slices of at most n items from seq."""
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+
+def _large_transfer_rows(
+    transfers: List[Dict[str, Any]], symbol: str, network: str, collected_at: int
+) -> List[Dict[str, Any]]:
+    """Build one metrics row per large transfer."""
+    return [
+        {
+            "symbol": symbol,
+            "network": network,
+            "contract_address": transfer.get("token_address"),
+            "timestamp": transfer["timestamp"],  # Already Unix timestamp (int)
+            "transaction_count": 1,
+            "transaction_volume": transfer["amount"],
+            "transaction_volume_usd": transfer.get("amount_usd"),
+            "additional_metrics": {
+                "type": "large_transfer",
+                "from_address": transfer["from_address"],
+                "to_address": transfer["to_address"],
+                "transaction_hash": transfer["transaction_hash"],
+                "block_number": transfer["block_number"]
+            }
+        }
+        for transfer in transfers
+    ]
+
+
+def _smart_money_rows(
+    activities: List[Dict[str, Any]], symbol: str, network: str, collected_at: int
+) -> List[Dict[str, Any]]:
+    """Build one metrics row per smart money transaction."""
+    return [
+        {
+            "symbol": symbol,
+            "network": network,
+            "contract_address": activity.get("token_address"),
+            "timestamp": activity["timestamp"],  # Already Unix timestamp (int)
+            "transaction_count": 1,
+            "transaction_volume": activity["amount"],
+            "transaction_volume_usd": activity.get("amount_usd"),
+            "dex_volume_usd": activity.get("amount_usd"),  # Use DEX metrics instead
+            "dex_trade_count": 1,
+            "additional_metrics": {
+                "type": "smart_money_activity",
+                "address": activity["address"],
+                "action": activity["action"],
+                "transaction_hash": activity["transaction_hash"],
+                "dex_protocol": activity.get("dex_protocol")
+            }
+        }
+        for activity in activities
+    ]
+
+
+def _netflow_rows(
+    netflow_data: Dict[str, Any], symbol: str, network: str, collected_at: int
+) -> List[Dict[str, Any]]:
+    """Build the aggregated exchange netflow row, stamped with the collection time."""
+    return [{
+        "symbol": symbol,
+        "network": network,
+        "contract_address": None,  # Aggregated data
+        "timestamp": collected_at,
+        "transaction_count": netflow_data["transaction_count"],
+        "transaction_volume": netflow_data.get("inflow", 0) + netflow_data.get("outflow", 0),
+        "active_addresses": netflow_data.get("unique_addresses", 0),
+        "additional_metrics": {
+            "type": "exchange_netflow",
+            "inflow": netflow_data.get("inflow", 0),
+            "outflow": netflow_data.get("outflow", 0),
+            "netflow": netflow_data.get("netflow", 0),
+            "time_range": netflow_data.get("time_range", {})
+        }
+    }]
+
+
+def _active_address_rows(
+    active_data: Dict[str, Any], symbol: str, network: str, collected_at: int
+) -> List[Dict[str, Any]]:
+    """Build the aggregated active addresses row, stamped with the collection time."""
+    return [{
+        "symbol": symbol,
+        "network": network,
+        "contract_address": None,  # Aggregated data
+        "timestamp": collected_at,
+        "transaction_count": active_data.get("transaction_count", 0),
+        "active_addresses": active_data.get("active_addresses", 0),
+        "new_addresses": active_data.get("new_addresses", 0),
+        "additional_metrics": {
+            "type": "active_addresses",
+            "sending_addresses": active_data.get("sending_addresses", 0),
+            "receiving_addresses": active_data.get("receiving_addresses", 0),
+            "average_transaction_value": active_data.get("average_transaction_value", 0),
+            "time_range": active_data.get("time_range", {})
+        }
+    }]
+
+
+def _transactions_result(
+    symbol: str,
+    network: str,
+    transactions: List[Dict[str, Any]],
+    stored_count: int,
+    time_range: Dict[str, str]
+) -> Dict[str, Any]:
+    """Build the response of a per-transaction collection."""
+    return {
+        "symbol": symbol,
+        "network": network,
+        "collected_count": len(transactions),
+        "stored_count": stored_count,
+        "time_range": time_range,
+        "sample_data": transactions[:5]
+    }
+
+
+class CollectionSpec(NamedTuple):
+    """
+    How to run one on-chain collection.
+
+    Attributes:
+        name: Human-readable name used in log messages
+        metric_type: additional_metrics["type"] of the stored rows
+        cache_key: Prefix of the collection's cache key ("<prefix>:<symbol>:<network>")
+        event_topic: Channel of the collection event
+        fetch_method: Name of the ChainDataInterface method returning the data
+        row_builder: Builds OnChainMetrics column dicts from
+            (data, symbol, network, collection unix time)
+        event_fields: Type-specific event fields from (data, stored row count)
+    """
+    name: str
+    metric_type: str
+    cache_key: str
+    event_topic: str
+    fetch_method: str
+    row_builder: Callable[[Any, str, str, int], List[Dict[str, Any]]]
+    event_fields: Callable[[Any, int], Dict[str, Any]]
+
+
+LARGE_TRANSFERS = CollectionSpec(
+    "large transfers", "large_transfer", "onchain:large_transfers",
+    "onchain.large_transfers.collected", "get_large_transfers",
+    _large_transfer_rows, lambda data, stored: {"count": stored}
+)
+SMART_MONEY_ACTIVITY = CollectionSpec(
+    "smart money activity", "smart_money_activity", "onchain:smart_money",
+    "onchain.smart_money.collected", "get_smart_money_activity",
+    _smart_money_rows, lambda data, stored: {"count": stored}
+)
+EXCHANGE_NETFLOW = CollectionSpec(
+    "exchange netflow", "exchange_netflow", "onchain:netflow",
+    "onchain.exchange_netflow.collected", "get_exchange_netflow",
+    _netflow_rows, lambda data, stored: {"netflow": data["netflow"]}
+)
+ACTIVE_ADDRESSES = CollectionSpec(
+    "active addresses", "active_addresses", "onchain:active_addresses",
+    "onchain.active_addresses.collected", "get_active_addresses",
+    _active_address_rows, lambda data, stored: {"active_addresses": data["active_addresses"]}
+)
+
 
 class OnChainService:
     """
@@ -26,14 +225,17 @@ class OnChainService:
     - Store metrics in database with upsert logic
     - Query metrics with filters
     - Publish events to Redis for downstream services
+
+    Collection methods run on a synchronous Session; query methods are
+    coroutines and expect an AsyncSession.
     """
     
-    def __init__(self, db: Session, chain_adapter: ChainDataInterface):
+    def __init__(self, db: Union[Session, AsyncSession], chain_adapter: ChainDataInterface):
         """
         Initialize OnChainService.
         
         Args:
-            db: Database session
+            db: Database session (AsyncSession for the query methods)
             chain_adapter: Chain data adapter (e.g., BitqueryAdapter)
         """
         self.db = db
@@ -61,91 +263,10 @@ class OnChainService:
         Returns:
             Collection result with count and sample data
         """
-        try:
-            end_time = datetime.utcnow()
-            start_time = end_time - timedelta(hours=hours)
-            
-            logger.info(f"Collecting large transfers for {symbol} on {network} (last {hours}h)")
-            
-            # Fetch data from chain adapter
-            transfers = self.chain_adapter.get_large_transfers(
-                symbol=symbol,
-                network=network,
-                min_amount=min_amount,
-                start_time=start_time,
-                end_time=end_time,
-                limit=limit
-            )
-            
-            # Store in database
-            stored_count = 0
-            for transfer in transfers:
-                # FIXED: Use correct field names from OnChainMetrics model
-                # FIXED: timestamp should be Unix timestamp (int), not datetime
-                metrics = OnChainMetrics(
-                    symbol=symbol,
-                    network=network,
-                    contract_address=transfer.get("token_address"),
-                    timestamp=transfer["timestamp"],  # Already Unix timestamp (int)
-                    transaction_count=1,
-                    transaction_volume=transfer["amount"],
-                    transaction_volume_usd=transfer.get("amount_usd"),
-                    additional_metrics={
-                        "type": "large_transfer",
-                        "from_address": transfer["from_address"],
-                        "to_address": transfer["to_address"],
-                        "transaction_hash": transfer["transaction_hash"],
-                        "block_number": transfer["block_number"]
-                    }
-                )
-                
-                # Upsert logic: check if record exists
-                # FIXED: Use proper JSON query syntax with cast
-                from sqlalchemy import cast, String
-                existing = self.db.query(OnChainMetrics).filter(
-                    and_(
-                        OnChainMetrics.symbol == symbol,
-                        OnChainMetrics.network == network,
-                        cast(OnChainMetrics.additional_metrics['transaction_hash'], String) == transfer["transaction_hash"]
-                    )
-                ).first()
-                
-                if not existing:
-                    self.db.add(metrics)
-                    stored_count += 1
-            
-            self.db.commit()
-            
-            # Invalidate Redis cache
-            cache_key = f"onchain:large_transfers:{symbol}:{network}"
-            self.redis_client.delete(cache_key)
-            
-            # Publish event
-            publish_event("onchain.large_transfers.collected", {
-                "symbol": symbol,
-                "network": network,
-                "count": stored_count,
-                "timestamp": datetime.utcnow().isoformat()
-            })
-            
-            logger.info(f"Successfully stored {stored_count} large transfers for {symbol}")
-            
-            return {
-                "symbol": symbol,
-                "network": network,
-                "collected_count": len(transfers),
-                "stored_count": stored_count,
-                "time_range": {
-                    "start": start_time.isoformat(),
-                    "end": end_time.isoformat()
-                },
-                "sample_data": transfers[:5] if transfers else []
-            }
-            
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Error collecting large transfers: {e}")
-            raise
+        transfers, stored_count, time_range = self._run_collection(
+            LARGE_TRANSFERS, symbol, network, hours, min_amount=min_amount, limit=limit
+        )
+        return _transactions_result(symbol, network, transfers, stored_count, time_range)
     
     def collect_smart_money_activity(
         self,
@@ -168,92 +289,10 @@ class OnChainService:
         Returns:
             Collection result
         """
-        try:
-            end_time = datetime.utcnow()
-            start_time = end_time - timedelta(hours=hours)
-            
-            logger.info(f"Collecting smart money activity for {symbol} on {network}")
-            
-            # Fetch data from chain adapter
-            activities = self.chain_adapter.get_smart_money_activity(
-                symbol=symbol,
-                network=network,
-                addresses=addresses,
-                start_time=start_time,
-                end_time=end_time,
-                limit=limit
-            )
-            
-            # Store in database
-            stored_count = 0
-            for activity in activities:
-                # FIXED: Use correct field names and timestamp format
-                metrics = OnChainMetrics(
-                    symbol=symbol,
-                    network=network,
-                    contract_address=activity.get("token_address"),
-                    timestamp=activity["timestamp"],  # Already Unix timestamp (int)
-                    transaction_count=1,
-                    transaction_volume=activity["amount"],
-                    transaction_volume_usd=activity.get("amount_usd"),
-                    dex_volume_usd=activity.get("amount_usd"),  # Use DEX metrics instead
-                    dex_trade_count=1,
-                    additional_metrics={
-                        "type": "smart_money_activity",
-                        "address": activity["address"],
-                        "action": activity["action"],
-                        "transaction_hash": activity["transaction_hash"],
-                        "dex_protocol": activity.get("dex_protocol")
-                    }
-                )
-                
-                # Upsert logic
-                # FIXED: Use proper JSON query syntax with cast
-                from sqlalchemy import cast, String
-                existing = self.db.query(OnChainMetrics).filter(
-                    and_(
-                        OnChainMetrics.symbol == symbol,
-                        OnChainMetrics.network == network,
-                        cast(OnChainMetrics.additional_metrics['transaction_hash'], String) == activity["transaction_hash"]
-                    )
-                ).first()
-                
-                if not existing:
-                    self.db.add(metrics)
-                    stored_count += 1
-            
-            self.db.commit()
-            
-            # Invalidate cache
-            cache_key = f"onchain:smart_money:{symbol}:{network}"
-            self.redis_client.delete(cache_key)
-            
-            # Publish event
-            publish_event("onchain.smart_money.collected", {
-                "symbol": symbol,
-                "network": network,
-                "count": stored_count,
-                "timestamp": datetime.utcnow().isoformat()
-            })
-            
-            logger.info(f"Successfully stored {stored_count} smart money activities")
-            
-            return {
-                "symbol": symbol,
-                "network": network,
-                "collected_count": len(activities),
-                "stored_count": stored_count,
-                "time_range": {
-                    "start": start_time.isoformat(),
-                    "end": end_time.isoformat()
-                },
-                "sample_data": activities[:5] if activities else []
-            }
-            
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Error collecting smart money activity: {e}")
-            raise
+        activities, stored_count, time_range = self._run_collection(
+            SMART_MONEY_ACTIVITY, symbol, network, hours, addresses=addresses, limit=limit
+        )
+        return _transactions_result(symbol, network, activities, stored_count, time_range)
     
     def collect_exchange_netflow(
         self,
@@ -274,68 +313,10 @@ class OnChainService:
         Returns:
             Collection result with netflow data
         """
-        try:
-            end_time = datetime.utcnow()
-            start_time = end_time - timedelta(hours=hours)
-            
-            logger.info(f"Collecting exchange netflow for {symbol} on {network}")
-            
-            # Fetch data from chain adapter
-            netflow_data = self.chain_adapter.get_exchange_netflow(
-                symbol=symbol,
-                network=network,
-                exchange_addresses=exchange_addresses,
-                start_time=start_time,
-                end_time=end_time
-            )
-            
-            # Store aggregated metrics
-            # FIXED: Use correct field names and timestamp format
-            metrics = OnChainMetrics(
-                symbol=symbol,
-                network=network,
-                contract_address=None,  # Aggregated data
-                timestamp=int(end_time.timestamp()),  # Convert to Unix timestamp
-                transaction_count=netflow_data["transaction_count"],
-                transaction_volume=netflow_data.get("inflow", 0) + netflow_data.get("outflow", 0),
-                active_addresses=netflow_data.get("unique_addresses", 0),
-                additional_metrics={
-                    "type": "exchange_netflow",
-                    "inflow": netflow_data.get("inflow", 0),
-                    "outflow": netflow_data.get("outflow", 0),
-                    "netflow": netflow_data.get("netflow", 0),
-                    "time_range": netflow_data.get("time_range", {})
-                }
-            )
-            
-            self.db.add(metrics)
-            self.db.commit()
-            
-            # Invalidate cache
-            cache_key = f"onchain:netflow:{symbol}:{network}"
-            self.redis_client.delete(cache_key)
-            
-            # Publish event
-            publish_event("onchain.exchange_netflow.collected", {
-                "symbol": symbol,
-                "network": network,
-                "netflow": netflow_data["netflow"],
-                "timestamp": datetime.utcnow().isoformat()
-            })
-            
-            logger.info(f"Successfully stored exchange netflow: {netflow_data['netflow']:.2f}")
-            
-            return {
-                "symbol": symbol,
-                "network": network,
-                "netflow_data": netflow_data,
-                "stored": True
-            }
-            
-        except Exception as e:
-            self.db.rollback()
-            logger.error(f"Error collecting exchange netflow: {e}")
-            raise
+        netflow_data, _, _ = self._run_collection(
+            EXCHANGE_NETFLOW, symbol, network, hours, exchange_addresses=exchange_addresses
+        )
+        return {"symbol": symbol, "network": network, "netflow_data": netflow_data, "stored": True}
 
     def collect_active_addresses(
         self,
@@ -354,78 +335,142 @@ class OnChainService:
         Returns:
             Collection result with active addresses data
         """
+        active_data, _, _ = self._run_collection(ACTIVE_ADDRESSES, symbol, network, hours)
+        return {"symbol": symbol, "network": network, "active_data": active_data, "stored": True}
+
+    def _run_collection(
+        self,
+        spec: CollectionSpec,
+        symbol: str,
+        network: str,
+        hours: int,
+        **fetch_kwargs: Any
+    ) -> Tuple[Any, int, Dict[str, str]]:
+        """
+        Fetch, store and announce one on-chain collection.
+        
+        Reads the clock once, fetches the window from the chain adapter,
+        bulk-inserts the rows built by the spec, then invalidates caches and
+        publishes the collection event in one Redis round-trip.
+        
+        Args:
+            spec: What to fetch, how to store it and which event to publish
+            symbol: Token symbol
+            network: Blockchain network
+            hours: Hours of historical data to collect
+            **fetch_kwargs: Extra arguments for the adapter method
+        
+        Returns:
+            Tuple of (adapter data, stored row count, time range)
+        """
         try:
-            end_time = datetime.utcnow()
+            # One clock read per collection, reused for the time range, stored rows and event
+            end_time = datetime.now(timezone.utc)
+            end_iso = end_time.isoformat()
             start_time = end_time - timedelta(hours=hours)
-
-            logger.info(f"Collecting active addresses for {symbol} on {network}")
-
-            # Fetch data from chain adapter
-            active_data = self.chain_adapter.get_active_addresses(
+            
+            logger.info(f"Collecting {spec.name} for {symbol} on {network} (last {hours}h)")
+            
+            data = getattr(self.chain_adapter, spec.fetch_method)(
                 symbol=symbol,
                 network=network,
                 start_time=start_time,
-                end_time=end_time
+                end_time=end_time,
+                **fetch_kwargs
             )
-
-            # Store aggregated metrics
-            # FIXED: Convert timestamp to Unix timestamp (int)
-            metrics = OnChainMetrics(
-                symbol=symbol,
-                network=network,
-                contract_address=None,  # Aggregated data
-                timestamp=int(end_time.timestamp()),  # Convert to Unix timestamp
-                transaction_count=active_data.get("transaction_count", 0),
-                active_addresses=active_data.get("active_addresses", 0),
-                new_addresses=active_data.get("new_addresses", 0),
-                additional_metrics={
-                    "type": "active_addresses",
-                    "sending_addresses": active_data.get("sending_addresses", 0),
-                    "receiving_addresses": active_data.get("receiving_addresses", 0),
-                    "average_transaction_value": active_data.get("average_transaction_value", 0),
-                    "time_range": active_data.get("time_range", {})
+            
+            stored_count = self._insert_new_rows(
+                spec.row_builder(data, symbol, network, int(end_time.timestamp()))
+            )
+            
+            # Invalidate cache and publish event in one round-trip
+            self._invalidate_and_publish(
+                (
+                    f"{spec.cache_key}:{symbol}:{network}",
+                    f"onchain:latest:{symbol}:{network}:all",
+                    f"onchain:latest:{symbol}:{network}:{spec.metric_type}"
+                ),
+                spec.event_topic,
+                {
+                    "symbol": symbol,
+                    "network": network,
+                    **spec.event_fields(data, stored_count),
+                    "timestamp": end_iso
                 }
             )
-
-            self.db.add(metrics)
-            self.db.commit()
-
-            # Invalidate cache
-            cache_key = f"onchain:active_addresses:{symbol}:{network}"
-            self.redis_client.delete(cache_key)
-
-            # Publish event
-            publish_event("onchain.active_addresses.collected", {
-                "symbol": symbol,
-                "network": network,
-                "active_addresses": active_data["active_addresses"],
-                "timestamp": datetime.utcnow().isoformat()
-            })
-
-            logger.info(f"Successfully stored active addresses: {active_data['active_addresses']}")
-
-            return {
-                "symbol": symbol,
-                "network": network,
-                "active_data": active_data,
-                "stored": True
-            }
-
+            
+            logger.info(f"Successfully stored {stored_count} {spec.name} rows for {symbol}")
+            
+            return data, stored_count, {"start": start_time.isoformat(), "end": end_iso}
+            
         except Exception as e:
             self.db.rollback()
-            logger.error(f"Error collecting active addresses: {e}")
+            logger.error(f"Error collecting {spec.name}: {e}")
             raise
+    
+    def _insert_new_rows(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert metrics rows, skipping transactions already stored.
+        
+        Runs INSERT ... ON CONFLICT DO NOTHING against the unique
+        (symbol, network, transaction_hash) index, one statement per
+        UPSERT_CHUNK_SIZE rows, and commits once. Aggregate rows carry no
+        transaction hash, fall outside the partial index and are always
+        inserted.
+        
+        Args:
+            rows: OnChainMetrics rows as column dicts (same keys in every row)
+        
+        Returns:
+            Number of rows inserted
+        """
+        inserted = 0
+        for chunk in _chunks(rows, UPSERT_CHUNK_SIZE):
+            stmt = pg_insert(OnChainMetrics).values(chunk).on_conflict_do_nothing(
+                index_elements=TX_HASH_CONFLICT_ELEMENTS,
+                index_where=TX_HASH_CONFLICT_WHERE
+            )
+            inserted += self.db.execute(stmt).rowcount
+        
+        if rows:
+            self.db.commit()
+        return inserted
+    
+    def _invalidate_and_publish(
+        self,
+        cache_keys: Tuple[str, ...],
+        channel: str,
+        event_data: Dict[str, Any]
+    ) -> None:
+        """
+        Delete cache keys and publish a collection event in one Redis round-trip.
+        
+        Args:
+            cache_keys: Cache keys to invalidate
+            channel: Event channel
+            event_data: Event payload
+        """
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.delete(*cache_keys)
+        publish_event(channel, event_data, pipeline=pipe)
+        pipe.execute()
 
-    def get_metrics(
+    async def get_metrics(
         self,
         symbol: str,
         network: str = "eth",
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
-        limit: int = 100
-    ) -> List[OnChainMetrics]:
+        limit: int = 100,
+        before_ts: Optional[datetime] = None,
+        include_raw: bool = False,
+        before: Optional[Tuple[int, int]] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Query on-chain metrics from database.
+        Query on-chain metrics from database, newest first.
+
+        Values nested in additional_metrics are projected as top-level columns
+        by Postgres, so rows come back flat and ready for OnChainMetricsData.
 
         Args:
             symbol: Token symbol
@@ -433,22 +478,37 @@ class OnChainService:
             start_time: Start time filter
             end_time: End time filter
             limit: Maximum number of records
+            before_ts: Timestamp-only cursor; only rows strictly older than this are returned
+            include_raw: Also return the raw additional_metrics JSON
+            before: Keyset cursor (unix timestamp, id) of the last row of the
+                previous page; only rows after it in (timestamp, id) DESC order are returned
 
         Returns:
-            List of OnChainMetrics records
+            List of metric row mappings
         """
         try:
-            query = self.db.query(OnChainMetrics).filter(
+            stmt = select(*self._metrics_columns(include_raw)).where(
                 OnChainMetrics.symbol == symbol,
                 OnChainMetrics.network == network
             )
 
+            # timestamp is stored as unix seconds: bounds are converted once so the
+            # filters compare integers and seek on idx_onchain_symbol_network_time.
+            # Naive datetimes are UTC, as in the K-line queries.
             if start_time:
-                query = query.filter(OnChainMetrics.timestamp >= start_time)
+                stmt = stmt.where(OnChainMetrics.timestamp >= _to_epoch_ms(start_time) // 1000)
             if end_time:
-                query = query.filter(OnChainMetrics.timestamp <= end_time)
-
-            metrics = query.order_by(desc(OnChainMetrics.timestamp)).limit(limit).all()
+                stmt = stmt.where(OnChainMetrics.timestamp <= _to_epoch_ms(end_time) // 1000)
+            if before_ts:
+                stmt = stmt.where(OnChainMetrics.timestamp < _to_epoch_ms(before_ts) // 1000)
+            if before:
+                # Rows sharing a timestamp (e.g. transfers in one block) are split by id
+                stmt = stmt.where(tuple_(OnChainMetrics.timestamp, OnChainMetrics.id) < before)
+
+            result = await self.db.execute(
+                stmt.order_by(desc(OnChainMetrics.timestamp), desc(OnChainMetrics.id)).limit(limit)
+            )
+            metrics = result.mappings().all()
 
             logger.info(f"Retrieved {len(metrics)} on-chain metrics for {symbol}")
             return metrics
@@ -457,7 +517,51 @@ class OnChainService:
             logger.error(f"Error querying on-chain metrics: {e}")
             raise
 
-    def get_latest_metrics(
+    @staticmethod
+    def _metrics_columns(include_raw: bool = False) -> List[Any]:
+        """
+        Build the column list for metric queries.
+
+        Args:
+            include_raw: Include the additional_metrics JSON column
+
+        Returns:
+            Columns and labelled JSON extractions for select()
+        """
+        columns = [
+            OnChainMetrics.id,
+            OnChainMetrics.symbol,
+            OnChainMetrics.network,
+            OnChainMetrics.contract_address,
+            OnChainMetrics.timestamp,
+            OnChainMetrics.transaction_count,
+            OnChainMetrics.transaction_volume,
+            OnChainMetrics.active_addresses,
+            OnChainMetrics.new_addresses,
+            OnChainMetrics.dex_trade_count,
+            OnChainMetrics.liquidity_usd,
+            OnChainMetrics.price_usd,
+        ]
+
+        for field, (key, field_type) in ADDITIONAL_METRIC_FIELDS.items():
+            value = OnChainMetrics.additional_metrics[key]
+            value = value.as_integer() if field_type is int else value.as_float()
+            columns.append(value.label(field))
+
+        # Prefer the dedicated dex_volume_usd column over the JSON value
+        columns.append(
+            func.coalesce(
+                OnChainMetrics.dex_volume_usd,
+                OnChainMetrics.additional_metrics["dex_volume"].as_float()
+            ).label("dex_volume")
+        )
+
+        if include_raw:
+            columns.append(OnChainMetrics.additional_metrics)
+
+        return columns
+
+    async def get_latest_metrics(
         self,
         symbol: str,
         network: str = "eth",
@@ -475,17 +579,16 @@ class OnChainService:
             Latest OnChainMetrics record or None
         """
         try:
-            query = self.db.query(OnChainMetrics).filter(
+            stmt = select(OnChainMetrics).where(
                 OnChainMetrics.symbol == symbol,
                 OnChainMetrics.network == network
             )
 
             if metric_type:
-                query = query.filter(
-                    OnChainMetrics.additional_metrics["type"].astext == metric_type
-                )
+                stmt = stmt.where(METRIC_TYPE_EXPR == metric_type)
 
-            metrics = query.order_by(desc(OnChainMetrics.timestamp)).first()
+            result = await self.db.scalars(stmt.order_by(desc(OnChainMetrics.timestamp)).limit(1))
+            metrics = result.first()
 
             if metrics:
                 logger.info(f"Retrieved latest on-chain metrics for {symbol}")
@@ -62,9 +62,16 @@ class CircuitBreakerLoggingListener(pybreaker.CircuitBreakerListener):
             )
 
 
-# Register listeners
-BINANCE_CIRCUIT_BREAKER.add_listener(CircuitBreakerLoggingListener())
-BITQUERY_CIRCUIT_BREAKER.add_listener(CircuitBreakerLoggingListener())
+# All circuit breakers by service name
+_BREAKERS = {
+    "binance": BINANCE_CIRCUIT_BREAKER,
+    "bitquery": BITQUERY_CIRCUIT_BREAKER
+}
+
+# Register listeners (the listener is stateless, so one instance serves every breaker)
+_LISTENER = CircuitBreakerLoggingListener()
+for _breaker in _BREAKERS.values():
+    _breaker.add_listener(_LISTENER)
 
 
 def with_circuit_breaker(breaker: pybreaker.CircuitBreaker):
@@ -136,8 +143,8 @@ def get_all_circuit_breaker_status() -> dict:
         Dictionary with all circuit breaker statuses
     """
     return {
-        "binance": get_circuit_breaker_status(BINANCE_CIRCUIT_BREAKER),
-        "bitquery": get_circuit_breaker_status(BITQUERY_CIRCUIT_BREAKER)
+        service: get_circuit_breaker_status(breaker)
+        for service, breaker in _BREAKERS.items()
     }
 
 
@@ -157,7 +164,7 @@ def reset_circuit_breaker(breaker: pybreaker.CircuitBreaker):
 
 def reset_all_circuit_breakers():
     """Reset all circuit breakers."""
-    reset_circuit_breaker(BINANCE_CIRCUIT_BREAKER)
-    reset_circuit_breaker(BITQUERY_CIRCUIT_BREAKER)
+    for breaker in _BREAKERS.values():
+        reset_circuit_breaker(breaker)
     logger.info("All circuit breakers reset")
 
@@ -18,9 +18,11 @@ Network Isolation:
 
 import pytest
 from datetime import datetime
-from unittest.mock import Mock, MagicMock, patch
+from unittest.mock import Mock, MagicMock, AsyncMock, patch
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.testclient import TestClient
 
 from shared.models.base import Base
@@ -72,22 +74,68 @@ def mock_db():
 
 
 @pytest.fixture(scope="function")
-def in_memory_db():
+def mock_async_db():
     """
-    Create an in-memory SQLite database for integration tests.
-    
+    Create a mock async database session.
+
     Returns:
-        SQLAlchemy session
+        Mock AsyncSession whose query methods are awaitable
+    """
+    db = AsyncMock(spec=AsyncSession)
+    db.execute = AsyncMock()
+    db.scalars = AsyncMock()
+    db.close = AsyncMock()
+    return db
+
+
+@pytest.fixture(scope="session")
+def in_memory_engine():
+    """
+    Create the in-memory SQLite engine shared by all tests.
+
+    StaticPool keeps a single connection open, which is what holds the
+    :memory: database, so the schema is created once per test session.
+
+    Returns:
+        SQLAlchemy engine
     """
-    engine = create_engine("sqlite:///:memory:")
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
     Base.metadata.create_all(engine)
-    SessionLocal = sessionmaker(bind=engine)
+
+    yield engine
+
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def in_memory_db(in_memory_engine):
+    """
+    Create a session on the shared in-memory SQLite database for integration tests.
+
+    Rows are deleted after each test instead of dropping and recreating
+    the tables.
+
+    Args:
+        in_memory_engine: Shared in-memory SQLite engine
+
+    Returns:
+        SQLAlchemy session
+    """
+    SessionLocal = sessionmaker(bind=in_memory_engine)
     db = SessionLocal()
-    
+
     yield db
-    
+
+    db.rollback()
+    for table in reversed(Base.metadata.sorted_tables):
+        db.execute(table.delete())
+    db.commit()
     db.close()
-    Base.metadata.drop_all(engine)
 
 
 # ============================================================================
@@ -302,7 +350,7 @@ def sample_large_transfers_data():
 # ============================================================================
 
 @pytest.fixture(scope="function")
-def mock_app(mock_db, mock_redis):
+def mock_app(mock_db, mock_async_db, mock_redis):
     """
     Create FastAPI app with mocked dependencies.
 
@@ -312,13 +360,14 @@ def mock_app(mock_db, mock_redis):
 
     Args:
         mock_db: Mocked database session
+        mock_async_db: Mocked async database session
         mock_redis: Mocked Redis client
 
     Yields:
         FastAPI app instance with overridden dependencies
     """
     from services.datahub.app.main import app
-    from shared.utils.database import get_db
+    from shared.utils.database import get_db, get_async_db
     from shared.utils.redis_client import get_redis_client
 
     # Store original dependency overrides
@@ -326,6 +375,7 @@ def mock_app(mock_db, mock_redis):
 
     # Override dependencies with mocks
     app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_async_db] = lambda: mock_async_db
     app.dependency_overrides[get_redis_client] = lambda: mock_redis
 
     yield app
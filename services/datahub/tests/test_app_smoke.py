@@ -0,0 +1,15 @@
+"""
+Smoke test for the DataHub application module.
+"""
+
+import pytest
+
+
+@pytest.mark.unit
+def test_app_imports():
+    """main.app imports and mounts the API routers."""
+    from services.datahub.app.main import app
+
+    paths = {route.path for route in app.routes}
+    assert "/v1/klines/collect/historical" in paths
+    assert "/v1/onchain/{symbol}/{network}" in paths
@@ -0,0 +1,31 @@
+"""
+Tests for the global error handlers.
+"""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from services.datahub.app.exceptions import BinanceAPIException
+
+
+@pytest.mark.unit
+@pytest.mark.api
+def test_external_api_exception_is_served_as_json(test_client):
+    """An ExternalAPIException subclass raised by an endpoint yields a 502 JSON body."""
+    error = BinanceAPIException("Binance is unavailable")
+
+    with patch(
+        "services.datahub.app.api.klines.KLineService.get_latest_kline",
+        new=AsyncMock(side_effect=error)
+    ):
+        response = test_client.get("/v1/klines/BTCUSDT/1h/latest")
+
+    assert response.status_code == 502
+    body = response.json()
+    assert body["error_code"] == "BINANCE_API_ERROR"
+    assert body["message"] == "Binance is unavailable"
+    assert body["path"] == "/v1/klines/BTCUSDT/1h/latest"
+    # Timestamp is rendered as an ISO-8601 string, not a datetime object
+    datetime.fromisoformat(body["timestamp"])
@@ -0,0 +1,41 @@
+"""
+Tests for the delta-of-delta encoding of the K-line range cache.
+"""
+
+import pytest
+
+from services.datahub.app.services.kline_service import _delta_of_delta, _undo_delta_of_delta
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("values", [
+    [],
+    [1700000000000],
+    [1700000000000, 1700000060000],
+    [1700000000000 + i * 60000 for i in range(50)],
+    [5, -3, 17, 17, 0, 1 << 40, 2],
+])
+def test_delta_of_delta_round_trip(values):
+    """Decoding an encoded list returns the original values."""
+    encoded = _delta_of_delta(values)
+
+    assert len(encoded) == len(values)
+    assert _undo_delta_of_delta(encoded) == values
+
+
+@pytest.mark.unit
+def test_delta_of_delta_evenly_spaced_values_encode_to_zeros():
+    """Evenly spaced timestamps become [first, step, 0, 0, ...]."""
+    values = [1700000000000 + i * 60000 for i in range(5)]
+
+    assert _delta_of_delta(values) == [1700000000000, 60000, 0, 0, 0]
+
+
+@pytest.mark.unit
+def test_delta_of_delta_does_not_modify_input():
+    """The caller's list is left untouched."""
+    values = [10, 20, 40]
+
+    _delta_of_delta(values)
+
+    assert values == [10, 20, 40]
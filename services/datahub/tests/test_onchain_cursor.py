@@ -0,0 +1,41 @@
+"""
+Tests for on-chain metrics pagination cursors.
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi import HTTPException
+
+from services.datahub.app.api.onchain import _parse_cursor, get_onchain_query_service
+from services.datahub.app.services.onchain_service import OnChainService
+
+
+@pytest.mark.unit
+def test_parse_cursor():
+    """A "<unix timestamp>:<id>" cursor parses into a (timestamp, id) tuple."""
+    assert _parse_cursor("1700000000:42") == (1700000000, 42)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("cursor", ["garbage", "1700000000", "1700000000:abc", "1:2:3", ":"])
+def test_parse_cursor_rejects_malformed_cursor(cursor):
+    """Malformed cursors raise a 400 HTTPException."""
+    with pytest.raises(HTTPException) as exc_info:
+        _parse_cursor(cursor)
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.unit
+@pytest.mark.api
+def test_get_onchain_metrics_malformed_cursor_returns_400(mock_app, test_client):
+    """The metrics endpoint answers a malformed cursor with 400 without querying."""
+    service = Mock(spec=OnChainService)
+    service.get_metrics = AsyncMock(return_value=[])
+    mock_app.dependency_overrides[get_onchain_query_service] = lambda: service
+
+    response = test_client.get("/v1/onchain/BTC/eth", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+    service.get_metrics.assert_not_called()
@@ -1,7 +1,18 @@
 """
 Shared utilities package.
 """
-from .database import get_db, init_db, close_db, engine, SessionLocal, Base
+from .database import (
+    get_db,
+    init_db,
+    close_db,
+    engine,
+    SessionLocal,
+    Base,
+    get_async_db,
+    get_async_engine,
+    get_async_session_factory,
+    close_async_db,
+)
 from .redis_client import (
     get_redis_client,
     publish_event,
@@ -11,7 +22,7 @@ from .redis_client import (
     cache_delete,
     close_redis,
 )
-from .logger import setup_logging, get_logger
+from .logger import setup_logging, get_logger, start_log_listener, stop_log_listener
 from .helpers import (
     get_utc_now,
     to_unix_timestamp,
@@ -49,6 +60,10 @@ __all__ = [
     "engine",
     "SessionLocal",
     "Base",
+    "get_async_db",
+    "get_async_engine",
+    "get_async_session_factory",
+    "close_async_db",
     # Redis utilities
     "get_redis_client",
     "publish_event",
@@ -60,6 +75,8 @@ __all__ = [
     # Logger utilities
     "setup_logging",
     "get_logger",
+    "start_log_listener",
+    "stop_log_listener",
     # Helper functions
     "get_utc_now",
     "to_unix_timestamp",
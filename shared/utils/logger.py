@@ -1,14 +1,134 @@
 """
 Shared logging utilities.
 Provides structured logging with consistent format across all services.
+
+By default records are rendered and written to stdout on the calling
+thread. A service that calls start_log_listener() (e.g. from its lifespan)
+switches to queued logging: records are handed to a queue on the calling
+thread and rendered (traceback formatting, JSON serialization) and written
+by a background QueueListener thread, so logging never blocks the event
+loop. stop_log_listener() drains the queue and switches back to direct
+writes, so records logged after shutdown are not lost.
 """
+import atexit
 import structlog
 import logging
+import logging.handlers
+import queue
 import sys
 import os
+from typing import Optional
+
+# Records are enqueued by _queue_handler and drained by _listener while it runs
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# stdout handler: attached to the root logger directly, or driven by _listener
+_output_handler: Optional[logging.Handler] = None
+
+
+class _NonFormattingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues records untouched.
+
+    The stdlib QueueHandler.prepare() formats the record on the calling
+    thread; skipping it defers all formatting to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _capture_exc_info(logger, method_name, event_dict):
+    """
+    Resolve exc_info=True to the live exception tuple on the calling thread.
+
+    sys.exc_info() is thread-local, so it must be captured before the record
+    crosses to the listener thread; formatting still happens there.
+    """
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+def _build_output_handler() -> logging.Handler:
+    """Create the stdout handler used by the listener thread."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.processors.format_exc_info,
+                structlog.processors.UnicodeDecoder(),
+                structlog.processors.JSONRenderer(),
+            ],
+            foreign_pre_chain=[
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.processors.TimeStamper(fmt="iso"),
+            ],
+        )
+    )
+    return handler
+
+
+_queue_handler = _NonFormattingQueueHandler(_log_queue)
+
 
+def _get_output_handler() -> logging.Handler:
+    """Return the shared stdout handler, creating it on first use."""
+    global _output_handler
 
-def setup_logging(service_name: str, log_level: str = None):
+    if _output_handler is None:
+        _output_handler = _build_output_handler()
+    return _output_handler
+
+
+def _route_root_logger(handler: logging.Handler):
+    """Make handler the root logger's only output (queue or direct stdout)."""
+    root_logger = logging.getLogger()
+    for other in (_queue_handler, _output_handler):
+        if other is not None and other is not handler:
+            root_logger.removeHandler(other)
+    if handler not in root_logger.handlers:
+        root_logger.addHandler(handler)
+
+
+def start_log_listener():
+    """
+    Start the background thread that writes queued log records.
+
+    Records are queued from then on instead of being written on the
+    calling thread. Safe to call repeatedly; does nothing if the listener
+    is running.
+    """
+    global _listener
+
+    if _listener is None:
+        _listener = logging.handlers.QueueListener(_log_queue, _get_output_handler())
+        _listener.start()
+        _route_root_logger(_queue_handler)
+
+
+def stop_log_listener():
+    """
+    Flush queued log records and stop the background listener thread.
+
+    Later records are written directly on the calling thread again.
+    """
+    global _listener
+
+    if _listener is not None:
+        # Switch first, so nothing is queued after the listener drains the queue
+        _route_root_logger(_get_output_handler())
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_log_listener)
+
+
+def setup_logging(service_name: str, log_level: Optional[str] = None):
     """
     Setup structured logging for a service.
     Args:
@@ -18,14 +138,13 @@ def setup_logging(service_name: str, log_level: str = None):
     if log_level is None:
         log_level = os.getenv("LOG_LEVEL", "INFO")
 
-    # Configure standard logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, log_level.upper()),
-    )
+    # Configure standard logging: direct stdout output, or the queue if the listener runs
+    root_logger = logging.getLogger()
+    if _queue_handler not in root_logger.handlers and _output_handler not in root_logger.handlers:
+        _route_root_logger(_queue_handler if _listener is not None else _get_output_handler())
+        root_logger.setLevel(getattr(logging, log_level.upper()))
 
-    # Configure structlog
+    # Configure structlog; rendering is done by the listener's ProcessorFormatter
     structlog.configure(
         processors=[
             structlog.stdlib.filter_by_level,
@@ -34,9 +153,8 @@ def setup_logging(service_name: str, log_level: str = None):
             structlog.stdlib.PositionalArgumentsFormatter(),
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer(),
+            _capture_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
         context_class=dict,
         logger_factory=structlog.stdlib.LoggerFactory(),
@@ -57,4 +175,3 @@ def get_logger(name: str = None):
         structlog.BoundLogger: Logger instance
     """
     return structlog.get_logger(name)
-
@@ -3,6 +3,7 @@ Shared Redis client utilities.
 Provides Redis connection pool and pub/sub functionality.
 """
 import redis
+from redis.client import Pipeline
 from redis.connection import ConnectionPool
 import os
 import json
@@ -28,16 +29,19 @@ def get_redis_client() -> redis.Redis:
     return redis.Redis(connection_pool=redis_pool)
 
 
-def publish_event(channel: str, event_data: dict) -> int:
+def publish_event(channel: str, event_data: dict, pipeline: Optional[Pipeline] = None) -> Any:
     """
     Publish event to Redis channel.
     Args:
         channel: Redis channel name (e.g., "signal.created")
         event_data: Event data dictionary
+        pipeline: Pipeline to queue the PUBLISH on instead of sending it
+            immediately (sent with the pipeline's execute())
     Returns:
         int: Number of subscribers that received the message
+            (the pipeline itself when queued on a pipeline)
     """
-    client = get_redis_client()
+    client = pipeline if pipeline is not None else get_redis_client()
     message = json.dumps(event_data)
     return client.publish(channel, message)
 